@@ -8,7 +8,13 @@ from .errors import (
     FileOperationError,
     AnalysisError,
 )
-from .root_availability import is_root_available, get_root_version, get_root_features
+from .root_availability import (
+    RootProbe,
+    get_root_probe,
+    is_root_available,
+    get_root_version,
+    get_root_features,
+)
 from .utils import format_bytes, ensure_path_exists, sanitize_filename
 
 __all__ = [
@@ -21,6 +27,8 @@ __all__ = [
     "format_bytes",
     "ensure_path_exists",
     "sanitize_filename",
+    "RootProbe",
+    "get_root_probe",
     "is_root_available",
     "get_root_version",
     "get_root_features",
@@ -4,19 +4,34 @@ from __future__ import annotations
 
 import logging
 import os
-import subprocess
 import sys
-from typing import Any
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import subprocess
 
 logger = logging.getLogger(__name__)
 
-# Cached results — computed once per process
-_root_available: bool | None = None
-_root_version: str | None = None
-_root_features: dict[str, bool] | None = None
-_root_pythonpath: str | None = None  # cached root-config --libdir result
+# Bumped by reset_cache() so callers holding an environment built from the
+# cached lookups (see RootCodeExecutor) know to rebuild it.
+_cache_generation = 0
+
+
+def _run(args: list[str], *, timeout: float, **kwargs: Any) -> subprocess.CompletedProcess[str]:
+    """Run *args* and capture its text output; every spawn in this module goes through here.
+
+    ``subprocess`` is imported on first use rather than at module level:
+    ``root_mcp.common`` re-exports this module, and most importers never
+    probe for ROOT.
+    """
+    import subprocess
+
+    return subprocess.run(args, capture_output=True, text=True, timeout=timeout, **kwargs)
 
 
+@lru_cache(maxsize=1)
 def _get_root_pythonpath() -> str | None:
     """
     Return the directory that must be on PYTHONPATH for 'import ROOT' to work.
@@ -26,33 +41,25 @@ def _get_root_pythonpath() -> str | None:
        (no extra injection needed).
     2. Otherwise, run ``root-config --libdir`` to find the ROOT library directory
        (which also contains the Python package).
-    """
-    global _root_pythonpath
-    if _root_pythonpath is not None:
-        return _root_pythonpath
 
+    Result (including "not found") is cached until :func:`reset_cache`, so
+    each execution does not spawn ``root-config`` again.
+    """
     # Check if it's already on sys.path / PYTHONPATH
     try:
         import importlib.util
 
         if importlib.util.find_spec("ROOT") is not None:
-            _root_pythonpath = ""  # already importable, nothing to inject
-            return None
+            return None  # already importable, nothing to inject
     except Exception:
         pass
 
     # Try root-config
     try:
-        result = subprocess.run(
-            ["root-config", "--libdir"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
+        result = _run(["root-config", "--libdir"], timeout=5)
         if result.returncode == 0:
             libdir = result.stdout.strip()
             if libdir and os.path.isdir(libdir):
-                _root_pythonpath = libdir
                 return libdir
     except Exception:
         pass
@@ -60,15 +67,11 @@ def _get_root_pythonpath() -> str | None:
     return None
 
 
+@lru_cache(maxsize=1)
 def _get_cppyy_api_path() -> str | None:
-    """Return the CPyCppyy API directory path, or None if not found."""
+    """Return the CPyCppyy API directory path, or None if not found (cached)."""
     try:
-        result = subprocess.run(
-            ["root-config", "--incdir"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
+        result = _run(["root-config", "--incdir"], timeout=5)
         if result.returncode == 0:
             incdir = result.stdout.strip()
             candidate = os.path.join(incdir, "CPyCppyy")
@@ -111,6 +114,11 @@ def _probe_root_subprocess() -> dict[str, Any]:
     Returns:
         Dict with keys: available, version, features
     """
+    # Imported here rather than at module level: ``root_mcp.common`` re-exports
+    # this module, and most importers never probe for ROOT.
+    import json
+    import subprocess
+
     probe_code = """
 import json, sys
 result = {"available": False, "version": None, "features": {}}
@@ -159,16 +167,8 @@ except Exception as e:
 print(json.dumps(result))
 """
     try:
-        proc = subprocess.run(
-            [sys.executable, "-c", probe_code],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            env=_build_root_env(),
-        )
+        proc = _run([sys.executable, "-c", probe_code], timeout=30, env=_build_root_env())
         if proc.returncode == 0 and proc.stdout.strip():
-            import json
-
             return json.loads(proc.stdout.strip())
         else:
             logger.debug(
@@ -185,24 +185,37 @@ print(json.dumps(result))
         return {"available": False, "version": None, "features": {}}
 
 
-def _ensure_probed() -> None:
-    """Run the ROOT probe if not already done, caching results."""
-    global _root_available, _root_version, _root_features
+@dataclass(frozen=True, slots=True)
+class RootProbe:
+    """Result of probing for native ROOT, shared by all accessors."""
 
-    if _root_available is not None:
-        return
+    available: bool = False
+    version: str | None = None
+    features: dict[str, bool] = field(default_factory=dict)
 
-    logger.info("Probing for native ROOT/PyROOT installation...")
-    result = _probe_root_subprocess()
 
-    _root_available = result.get("available", False)
-    _root_version = result.get("version")
-    _root_features = result.get("features", {})
+@lru_cache(maxsize=1)
+def get_root_probe() -> RootProbe:
+    """
+    Probe for native ROOT once per process and return the full result.
 
-    if _root_available:
-        logger.info("Native ROOT %s detected", _root_version)
+    Callers that need several fields (availability, version and features)
+    should call this once rather than each accessor in turn.
+    Result is cached after the first call; see :func:`reset_cache`.
+    """
+    logger.info("Probing for native ROOT/PyROOT installation...")
+    result = _probe_root_subprocess()
+    probe = RootProbe(
+        available=result.get("available", False),
+        version=result.get("version"),
+        features=result.get("features") or {},
+    )
+
+    if probe.available:
+        logger.info("Native ROOT %s detected", probe.version)
     else:
         logger.info("Native ROOT not available")
+    return probe
 
 
 def is_root_available() -> bool:
@@ -211,8 +224,7 @@ def is_root_available() -> bool:
 
     Result is cached after the first call.
     """
-    _ensure_probed()
-    return _root_available  # type: ignore[return-value]
+    return get_root_probe().available
 
 
 def get_root_version() -> str | None:
@@ -221,8 +233,7 @@ def get_root_version() -> str | None:
 
     Result is cached after the first call.
     """
-    _ensure_probed()
-    return _root_version
+    return get_root_probe().version
 
 
 def get_root_features() -> dict[str, bool]:
@@ -235,17 +246,19 @@ def get_root_features() -> dict[str, bool]:
     Returns empty dict if ROOT is not available.
     Result is cached after the first call.
     """
-    _ensure_probed()
-    return _root_features or {}
+    return get_root_probe().features
 
 
 def reset_cache() -> None:
     """
-    Reset the cached probe results.
+    Reset the cached probe results and ``root-config`` lookups.
 
-    Useful for testing or after environment changes.
+    Useful for testing or after environment changes. Invalidation is lazy:
+    this never spawns a subprocess itself, and the server never calls it, so
+    outside of tests the probe runs at most once per process.
     """
-    global _root_available, _root_version, _root_features
-    _root_available = None
-    _root_version = None
-    _root_features = None
+    global _cache_generation
+    _cache_generation += 1
+    get_root_probe.cache_clear()
+    _get_root_pythonpath.cache_clear()
+    _get_cppyy_api_path.cache_clear()
@@ -3,17 +3,24 @@
 from __future__ import annotations
 
 import argparse
+from collections.abc import Callable, Iterable
+from functools import lru_cache
 from importlib.metadata import PackageNotFoundError, version as _dist_version
 import logging
+from operator import attrgetter
 import os
 from pathlib import Path
 import re
+from typing import Any
 
 import yaml
 from pydantic import BaseModel, Field, field_validator
 
 
+@lru_cache(maxsize=1)
 def _package_version() -> str:
+    # Distribution metadata lookup scans sys.path and dominates the cost of
+    # building a default Config; the installed version cannot change mid-process.
     try:
         return _dist_version("root-mcp")
     except PackageNotFoundError:
@@ -42,6 +49,11 @@ class CacheConfig(BaseModel):
     file_cache_size: int = Field(50, gt=0)
 
 
+def _is_valid_resource_name(name: str) -> bool:
+    """Return True when *name* is alphanumeric apart from ``_`` and ``-``."""
+    return name.replace("_", "").replace("-", "").isalnum()
+
+
 class ResourceConfig(BaseModel):
     """Configuration for a data resource (MCP root)."""
 
@@ -55,7 +67,7 @@ class ResourceConfig(BaseModel):
     @classmethod
     def validate_name(cls, v: str) -> str:
         """Ensure resource name is valid."""
-        if not v.replace("_", "").replace("-", "").isalnum():
+        if not _is_valid_resource_name(v):
             raise ValueError("Resource name must be alphanumeric (with _ or -)")
         return v
 
@@ -395,8 +407,14 @@ def create_default_config(
     print(f"Created default config at: {output_path}")
 
 
-#: Log levels accepted by :func:`apply_log_level`.
-_VALID_LOG_LEVELS: tuple[str, ...] = ("DEBUG", "INFO", "WARNING", "ERROR")
+#: Log levels accepted by :func:`apply_log_level`, mapped to their numeric value.
+_LOG_LEVELS: dict[str, int] = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+_VALID_LOG_LEVELS: tuple[str, ...] = tuple(_LOG_LEVELS)
 
 
 def apply_log_level(level_str: str) -> None:
@@ -413,10 +431,12 @@ def apply_log_level(level_str: str) -> None:
     Raises:
         ValueError: When *level_str* is not one of the accepted names.
     """
-    normalised = level_str.strip().upper()
-    if normalised not in _VALID_LOG_LEVELS:
+    # Both callers in main() already pass upper-case names, so try the string
+    # as given before paying for strip()/upper().
+    level = _LOG_LEVELS.get(level_str) or _LOG_LEVELS.get(level_str.strip().upper())
+    if level is None:
         raise ValueError(f"Log level must be one of {_VALID_LOG_LEVELS}, got: {level_str!r}")
-    logging.getLogger().setLevel(normalised)
+    logging.getLogger().setLevel(level)
 
 
 def _parse_resource_spec(spec: str) -> ResourceConfig:
@@ -436,23 +456,268 @@ def _parse_resource_spec(spec: str) -> ResourceConfig:
     Raises:
         ValueError: When the spec is malformed or the resource name is invalid.
     """
-    if "=" not in spec:
+    name, sep, rest = spec.partition("=")
+    if not sep:
         raise ValueError(f"Resource spec must be NAME=URI or NAME=URI|DESCRIPTION, got: {spec!r}")
-    name, rest = spec.split("=", 1)
     name = name.strip()
     if not name:
         raise ValueError(f"Resource name is empty in spec: {spec!r}")
-    if "|" in rest:
-        uri, description = rest.split("|", 1)
-        uri = uri.strip()
-        description = description.strip()
-    else:
-        uri = rest.strip()
-        description = ""
+    if not _is_valid_resource_name(name):
+        raise ValueError(f"Resource name must be alphanumeric (with _ or -), got: {name!r}")
+    uri, _, description = rest.partition("|")
+    uri = uri.strip()
+    description = description.strip()
     if not uri:
         raise ValueError(f"Resource URI is empty in spec: {spec!r}")
-    # ResourceConfig.validate_name will raise if the name contains bad chars.
-    return ResourceConfig(name=name, uri=uri, description=description)
+    # Every field has been checked above, so skip pydantic's validation pass.
+    return ResourceConfig.model_construct(name=name, uri=uri, description=description)
+
+
+def _merge_resources(config: Config, candidates: Iterable[ResourceConfig]) -> None:
+    """Append *candidates* to ``config.resources``, skipping URIs already present.
+
+    Existing URIs and names are collected into sets once, so merging N
+    candidates into M resources costs O(N + M).  A candidate whose name is
+    taken is renamed ``name_1``, ``name_2``, ... until it is unique.
+    """
+    existing_uris = {r.uri for r in config.resources}
+    existing_names = {r.name for r in config.resources}
+    added: list[ResourceConfig] = []
+    for res in candidates:
+        if res.uri in existing_uris:
+            continue
+        base = res.name
+        ctr = 1
+        while res.name in existing_names:
+            res = ResourceConfig(name=f"{base}_{ctr}", uri=res.uri, description=res.description)
+            ctr += 1
+        added.append(res)
+        existing_uris.add(res.uri)
+        existing_names.add(res.name)
+    config.resources.extend(added)
+
+
+def _setter(parent_path: str, attr: str) -> Callable[[Config, Any], None]:
+    """Return a function that assigns ``attr`` on the sub-model at *parent_path*."""
+    get_parent = attrgetter(parent_path)
+
+    def _set(config: Config, value: Any) -> None:
+        setattr(get_parent(config), attr, value)
+
+    return _set
+
+
+def _check_positive(value: float, flag: str) -> float:
+    if value <= 0:
+        raise ValueError(f"{flag} must be > 0, got: {value}")
+    return value
+
+
+def _check_plot_format(value: str, flag: str) -> str:
+    if value not in ("png", "pdf", "svg"):
+        raise ValueError(f"{flag} must be 'png', 'pdf', or 'svg', got: {value!r}")
+    return value
+
+
+#: ``(args attribute, CLI flag, config path, check)`` for every CLI option whose
+#: value is checked before it is applied.  argparse has already converted
+#: numbers to int/float; *check* raises ``ValueError`` naming the flag.  Entries
+#: are in the order the flags are validated, so when several are invalid the
+#: first one listed here is the one reported.
+_CLI_CHECKED_OPTIONS: tuple[tuple[str, str, str, Callable[[Any, str], Any]], ...] = (
+    ("max_path_depth", "--max-path-depth", "security.max_path_depth", _check_positive),
+    ("max_rows", "--max-rows", "core.limits.max_rows_per_call", _check_positive),
+    ("max_export_rows", "--max-export-rows", "core.limits.max_export_rows", _check_positive),
+    ("cache_size", "--cache-size", "core.cache.file_cache_size", _check_positive),
+    ("max_bins_1d", "--max-bins-1d", "extended.histogram.max_bins_1d", _check_positive),
+    ("max_bins_2d", "--max-bins-2d", "extended.histogram.max_bins_2d", _check_positive),
+    (
+        "fitting_iterations",
+        "--fitting-iterations",
+        "extended.fitting_max_iterations",
+        _check_positive,
+    ),
+    ("plot_dpi", "--plot-dpi", "extended.plotting.dpi", _check_positive),
+    ("plot_format", "--plot-format", "extended.plotting.default_format", _check_plot_format),
+    ("plot_width", "--plot-width", "extended.plotting.figure_width", _check_positive),
+    ("plot_height", "--plot-height", "extended.plotting.figure_height", _check_positive),
+    ("root_timeout", "--root-timeout", "root_native.execution_timeout", _check_positive),
+    ("root_max_output", "--root-max-output", "root_native.max_output_size", _check_positive),
+    ("root_max_code", "--root-max-code", "root_native.max_code_length", _check_positive),
+)
+
+#: Dotted paths of every config field that env vars or CLI flags can set.
+_OVERRIDABLE_PATHS: tuple[str, ...] = (
+    "server.mode",
+    "server.name",
+    "security.allowed_roots",
+    "security.allow_remote",
+    "security.allowed_protocols",
+    "output.export_base_path",
+    "output.allowed_formats",
+    "features.enable_export",
+    "core.cache.enabled",
+    "root_native.working_directory",
+    *(path for _, _, path, _ in _CLI_CHECKED_OPTIONS),
+)
+
+#: Setters keyed by dotted config path, built once at import so the override
+#: functions do not re-walk the attribute chain by name on every assignment.
+_SETTERS: dict[str, Callable[[Config, Any], None]] = {
+    path: _setter(*path.rsplit(".", 1)) for path in _OVERRIDABLE_PATHS
+}
+
+
+#: Separator between specs in ``ROOT_MCP_RESOURCES``, including surrounding whitespace.
+_RESOURCE_SEP = re.compile(r"\s*;\s*")
+
+
+def _parse_positive_int(val: str, var_name: str) -> int:
+    # Plain decimal digits cannot fail int(); anything else ("-3", "+5",
+    # "1_000", "abc") takes the general path so its error message is unchanged.
+    if val.isdecimal():
+        n = int(val)
+    else:
+        try:
+            n = int(val)
+        except ValueError:
+            raise ValueError(f"{var_name} must be an integer, got: {val!r}")
+    if n <= 0:
+        raise ValueError(f"{var_name} must be > 0, got: {n}")
+    return n
+
+
+def _parse_positive_float(val: str, var_name: str) -> float:
+    try:
+        n = float(val)
+    except ValueError:
+        raise ValueError(f"{var_name} must be a number, got: {val!r}")
+    if n <= 0:
+        raise ValueError(f"{var_name} must be > 0, got: {n}")
+    return n
+
+
+def _parse_plot_format(val: str, var_name: str) -> str:
+    fmt = val.lower()
+    if fmt not in ("png", "pdf", "svg"):
+        raise ValueError(f"{var_name} must be 'png', 'pdf', or 'svg', got: {fmt!r}")
+    return fmt
+
+
+#: ``env var -> (config path, parser)`` for every env var whose value is parsed
+#: and checked; the parser raises ``ValueError`` naming the variable.  Entries
+#: are in the order the variables are validated, so when several are invalid
+#: the first one listed here is the one reported.
+_ENV_PARSED_OPTIONS: dict[str, tuple[str, Callable[[str, str], Any]]] = {
+    "ROOT_MCP_MAX_PATH_DEPTH": ("security.max_path_depth", _parse_positive_int),
+    "ROOT_MCP_MAX_ROWS": ("core.limits.max_rows_per_call", _parse_positive_int),
+    "ROOT_MCP_MAX_EXPORT_ROWS": ("core.limits.max_export_rows", _parse_positive_int),
+    "ROOT_MCP_CACHE_SIZE": ("core.cache.file_cache_size", _parse_positive_int),
+    "ROOT_MCP_MAX_BINS_1D": ("extended.histogram.max_bins_1d", _parse_positive_int),
+    "ROOT_MCP_MAX_BINS_2D": ("extended.histogram.max_bins_2d", _parse_positive_int),
+    "ROOT_MCP_FITTING_ITERATIONS": ("extended.fitting_max_iterations", _parse_positive_int),
+    "ROOT_MCP_PLOT_DPI": ("extended.plotting.dpi", _parse_positive_int),
+    "ROOT_MCP_PLOT_FORMAT": ("extended.plotting.default_format", _parse_plot_format),
+    "ROOT_MCP_PLOT_WIDTH": ("extended.plotting.figure_width", _parse_positive_float),
+    "ROOT_MCP_PLOT_HEIGHT": ("extended.plotting.figure_height", _parse_positive_float),
+    "ROOT_MCP_ROOT_TIMEOUT": ("root_native.execution_timeout", _parse_positive_int),
+    "ROOT_MCP_ROOT_MAX_OUTPUT": ("root_native.max_output_size", _parse_positive_int),
+    "ROOT_MCP_ROOT_MAX_CODE": ("root_native.max_code_length", _parse_positive_int),
+}
+_ENV_PARSE_ORDER: dict[str, int] = {var: i for i, var in enumerate(_ENV_PARSED_OPTIONS)}
+
+
+@lru_cache(maxsize=32)
+def _resolve_env_overrides(
+    env: frozenset[tuple[str, str]], cwd: str
+) -> tuple[tuple[tuple[str, Any], ...], tuple[ResourceConfig, ...]]:
+    """Parse and validate a ``ROOT_MCP_*`` snapshot for :func:`apply_env_overrides`.
+
+    The result depends only on the snapshot (and *cwd*, which relative paths
+    resolve against), so it is cached: repeated calls with an unchanged
+    environment skip parsing and validation entirely.  Invalid values raise
+    and are therefore never cached.
+
+    Returns:
+        ``(updates, resources)`` where *updates* holds ``(config path, value)``
+        pairs — list-valued settings as tuples so the cached value stays
+        immutable — and *resources* the parsed ``ROOT_MCP_RESOURCES`` entries.
+    """
+    _getenv = dict(env).get
+    updates: list[tuple[str, Any]] = []
+
+    # --- : Server & Mode ---
+    _env_mode = _getenv("ROOT_MCP_MODE", "").strip()
+    if _env_mode:
+        if _env_mode not in ("core", "extended"):
+            raise ValueError(f"ROOT_MCP_MODE must be 'core' or 'extended', got: {_env_mode!r}")
+        updates.append(("server.mode", _env_mode))
+
+    _env_name = _getenv("ROOT_MCP_SERVER_NAME", "").strip()
+    if _env_name:
+        updates.append(("server.name", _env_name))
+
+    # --- : Security ---
+    _env_allowed_roots = _getenv("ROOT_MCP_ALLOWED_ROOTS", "").strip()
+    if _env_allowed_roots:
+        roots = tuple(r.strip() for r in _env_allowed_roots.split(":") if r.strip())
+        updates.append(("security.allowed_roots", roots))
+
+    _env_allow_remote = _getenv("ROOT_MCP_ALLOW_REMOTE", "").strip().lower()
+    if _env_allow_remote:
+        updates.append(("security.allow_remote", _env_allow_remote in ("1", "true", "yes")))
+
+    _env_allowed_protocols = _getenv("ROOT_MCP_ALLOWED_PROTOCOLS", "").strip()
+    if _env_allowed_protocols:
+        protocols = tuple(p.strip().lower() for p in _env_allowed_protocols.split(",") if p.strip())
+        updates.append(("security.allowed_protocols", protocols))
+
+    # --- : Output / Export ---
+    _env_export_path = _getenv("ROOT_MCP_EXPORT_PATH", "").strip()
+    if _env_export_path:
+        updates.append(("output.export_base_path", str(Path(_env_export_path).resolve())))
+
+    _env_export_formats = _getenv("ROOT_MCP_EXPORT_FORMATS", "").strip()
+    if _env_export_formats:
+        formats = tuple(f.strip().lower() for f in _env_export_formats.split(",") if f.strip())
+        updates.append(("output.allowed_formats", formats))
+
+    _env_enable_export = _getenv("ROOT_MCP_ENABLE_EXPORT", "").strip().lower()
+    if _env_enable_export:
+        updates.append(("features.enable_export", _env_enable_export in ("1", "true", "yes")))
+
+    # --- : Core Limits & Cache ---
+    _env_cache = _getenv("ROOT_MCP_CACHE", "").strip().lower()
+    if _env_cache:
+        updates.append(("core.cache.enabled", _env_cache in ("1", "true", "yes")))
+
+    # --- : Native ROOT Execution ---
+    _env_root_workdir = _getenv("ROOT_MCP_ROOT_WORKDIR", "").strip()
+    if _env_root_workdir:
+        updates.append(("root_native.working_directory", _env_root_workdir))
+
+    # --- : Numeric limits and plot format (security, core, extended, native ROOT) ---
+    # Dispatch on the variables actually set rather than probing every table
+    # entry, validating them in table order so the reported error does not
+    # depend on which other variables happen to be set.
+    _present = [_var for _var, _ in env if _var in _ENV_PARSED_OPTIONS]
+    for _var in sorted(_present, key=_ENV_PARSE_ORDER.__getitem__):
+        _raw = _getenv(_var).strip()
+        if _raw:
+            _path, _parse = _ENV_PARSED_OPTIONS[_var]
+            updates.append((_path, _parse(_raw, _var)))
+
+    # --- : Remote Resources ---
+    resources: list[ResourceConfig] = []
+    _env_resources = _getenv("ROOT_MCP_RESOURCES", "").strip()
+    if _env_resources:
+        # The value is already stripped and the separator pattern swallows the
+        # whitespace around each ";", so only empty segments remain to skip.
+        for _spec in _RESOURCE_SEP.split(_env_resources):
+            if _spec:
+                resources.append(_parse_resource_spec(_spec))
+
+    return tuple(updates), tuple(resources)
 
 
 def apply_env_overrides(config: Config) -> Config:
@@ -531,185 +796,22 @@ def apply_env_overrides(config: Config) -> Config:
         ValueError: When an env var contains an invalid value (e.g. an
             unrecognised mode string).
     """
-    # --- : Server & Mode ---
-    _env_mode = os.environ.get("ROOT_MCP_MODE", "").strip()
-    if _env_mode:
-        if _env_mode not in ("core", "extended"):
-            raise ValueError(f"ROOT_MCP_MODE must be 'core' or 'extended', got: {_env_mode!r}")
-        config.server.mode = _env_mode
-
-    _env_name = os.environ.get("ROOT_MCP_SERVER_NAME", "").strip()
-    if _env_name:
-        config.server.name = _env_name
-
-    # --- : Security ---
-    _env_allowed_roots = os.environ.get("ROOT_MCP_ALLOWED_ROOTS", "").strip()
-    if _env_allowed_roots:
-        roots = [r.strip() for r in _env_allowed_roots.split(":") if r.strip()]
-        config.security.allowed_roots = roots
-
-    _env_allow_remote = os.environ.get("ROOT_MCP_ALLOW_REMOTE", "").strip().lower()
-    if _env_allow_remote:
-        config.security.allow_remote = _env_allow_remote in ("1", "true", "yes")
-
-    _env_allowed_protocols = os.environ.get("ROOT_MCP_ALLOWED_PROTOCOLS", "").strip()
-    if _env_allowed_protocols:
-        protocols = [p.strip().lower() for p in _env_allowed_protocols.split(",") if p.strip()]
-        config.security.allowed_protocols = protocols
-
-    _env_max_depth = os.environ.get("ROOT_MCP_MAX_PATH_DEPTH", "").strip()
-    if _env_max_depth:
-        try:
-            depth = int(_env_max_depth)
-        except ValueError:
-            raise ValueError(f"ROOT_MCP_MAX_PATH_DEPTH must be an integer, got: {_env_max_depth!r}")
-        if depth <= 0:
-            raise ValueError(f"ROOT_MCP_MAX_PATH_DEPTH must be > 0, got: {depth}")
-        config.security.max_path_depth = depth
-
-    # --- : Output / Export ---
-    _env_export_path = os.environ.get("ROOT_MCP_EXPORT_PATH", "").strip()
-    if _env_export_path:
-        config.output.export_base_path = str(Path(_env_export_path).resolve())
-
-    _env_export_formats = os.environ.get("ROOT_MCP_EXPORT_FORMATS", "").strip()
-    if _env_export_formats:
-        formats = [f.strip().lower() for f in _env_export_formats.split(",") if f.strip()]
-        config.output.allowed_formats = formats
-
-    _env_enable_export = os.environ.get("ROOT_MCP_ENABLE_EXPORT", "").strip().lower()
-    if _env_enable_export:
-        config.features.enable_export = _env_enable_export in ("1", "true", "yes")
-
-    # --- : Core Limits & Cache ---
-    def _parse_positive_int(val: str, var_name: str) -> int:
-        try:
-            n = int(val)
-        except ValueError:
-            raise ValueError(f"{var_name} must be an integer, got: {val!r}")
-        if n <= 0:
-            raise ValueError(f"{var_name} must be > 0, got: {n}")
-        return n
-
-    _env_max_rows = os.environ.get("ROOT_MCP_MAX_ROWS", "").strip()
-    if _env_max_rows:
-        config.core.limits.max_rows_per_call = _parse_positive_int(
-            _env_max_rows, "ROOT_MCP_MAX_ROWS"
-        )
-
-    _env_max_export_rows = os.environ.get("ROOT_MCP_MAX_EXPORT_ROWS", "").strip()
-    if _env_max_export_rows:
-        config.core.limits.max_export_rows = _parse_positive_int(
-            _env_max_export_rows, "ROOT_MCP_MAX_EXPORT_ROWS"
-        )
-
-    _env_cache = os.environ.get("ROOT_MCP_CACHE", "").strip().lower()
-    if _env_cache:
-        config.core.cache.enabled = _env_cache in ("1", "true", "yes")
-
-    _env_cache_size = os.environ.get("ROOT_MCP_CACHE_SIZE", "").strip()
-    if _env_cache_size:
-        config.core.cache.file_cache_size = _parse_positive_int(
-            _env_cache_size, "ROOT_MCP_CACHE_SIZE"
-        )
-
-    # --- : Extended Analysis ---
-    def _parse_positive_float(val: str, var_name: str) -> float:
-        try:
-            n = float(val)
-        except ValueError:
-            raise ValueError(f"{var_name} must be a number, got: {val!r}")
-        if n <= 0:
-            raise ValueError(f"{var_name} must be > 0, got: {n}")
-        return n
-
-    _env_max_bins_1d = os.environ.get("ROOT_MCP_MAX_BINS_1D", "").strip()
-    if _env_max_bins_1d:
-        config.extended.histogram.max_bins_1d = _parse_positive_int(
-            _env_max_bins_1d, "ROOT_MCP_MAX_BINS_1D"
-        )
-
-    _env_max_bins_2d = os.environ.get("ROOT_MCP_MAX_BINS_2D", "").strip()
-    if _env_max_bins_2d:
-        config.extended.histogram.max_bins_2d = _parse_positive_int(
-            _env_max_bins_2d, "ROOT_MCP_MAX_BINS_2D"
-        )
-
-    _env_fitting_iters = os.environ.get("ROOT_MCP_FITTING_ITERATIONS", "").strip()
-    if _env_fitting_iters:
-        config.extended.fitting_max_iterations = _parse_positive_int(
-            _env_fitting_iters, "ROOT_MCP_FITTING_ITERATIONS"
-        )
-
-    _env_plot_dpi = os.environ.get("ROOT_MCP_PLOT_DPI", "").strip()
-    if _env_plot_dpi:
-        config.extended.plotting.dpi = _parse_positive_int(_env_plot_dpi, "ROOT_MCP_PLOT_DPI")
-
-    _env_plot_format = os.environ.get("ROOT_MCP_PLOT_FORMAT", "").strip().lower()
-    if _env_plot_format:
-        if _env_plot_format not in ("png", "pdf", "svg"):
-            raise ValueError(
-                f"ROOT_MCP_PLOT_FORMAT must be 'png', 'pdf', or 'svg', got: {_env_plot_format!r}"
-            )
-        config.extended.plotting.default_format = _env_plot_format
-
-    _env_plot_width = os.environ.get("ROOT_MCP_PLOT_WIDTH", "").strip()
-    if _env_plot_width:
-        config.extended.plotting.figure_width = _parse_positive_float(
-            _env_plot_width, "ROOT_MCP_PLOT_WIDTH"
-        )
-
-    _env_plot_height = os.environ.get("ROOT_MCP_PLOT_HEIGHT", "").strip()
-    if _env_plot_height:
-        config.extended.plotting.figure_height = _parse_positive_float(
-            _env_plot_height, "ROOT_MCP_PLOT_HEIGHT"
-        )
-
-    # --- : Native ROOT Execution ---
-    _env_root_timeout = os.environ.get("ROOT_MCP_ROOT_TIMEOUT", "").strip()
-    if _env_root_timeout:
-        config.root_native.execution_timeout = _parse_positive_int(
-            _env_root_timeout, "ROOT_MCP_ROOT_TIMEOUT"
-        )
-
-    _env_root_workdir = os.environ.get("ROOT_MCP_ROOT_WORKDIR", "").strip()
-    if _env_root_workdir:
-        config.root_native.working_directory = _env_root_workdir
-
-    _env_root_max_output = os.environ.get("ROOT_MCP_ROOT_MAX_OUTPUT", "").strip()
-    if _env_root_max_output:
-        config.root_native.max_output_size = _parse_positive_int(
-            _env_root_max_output, "ROOT_MCP_ROOT_MAX_OUTPUT"
-        )
-
-    _env_root_max_code = os.environ.get("ROOT_MCP_ROOT_MAX_CODE", "").strip()
-    if _env_root_max_code:
-        config.root_native.max_code_length = _parse_positive_int(
-            _env_root_max_code, "ROOT_MCP_ROOT_MAX_CODE"
-        )
+    # One pass over os.environ; a frozenset key needs no sorting to be stable.
+    env = frozenset(item for item in os.environ.items() if item[0].startswith("ROOT_MCP_"))
+    if not env:
+        # Common case: nothing to parse, merge or resolve (no getcwd call either).
+        return config
+    # Relative ROOT_MCP_EXPORT_PATH values resolve against the working
+    # directory, so it is part of the cache key.
+    updates, env_resources = _resolve_env_overrides(env, os.getcwd())
+    for _path, _value in updates:
+        # List values are cached as tuples; give every config its own list.
+        _SETTERS[_path](config, list(_value) if isinstance(_value, tuple) else _value)
 
     # --- : Remote Resources ---
-    _env_resources = os.environ.get("ROOT_MCP_RESOURCES", "").strip()
-    if _env_resources:
-        _existing_uris = {r.uri for r in config.resources}
-        _existing_names = {r.name for r in config.resources}
-        for _spec in _env_resources.split(";"):
-            _spec = _spec.strip()
-            if not _spec:
-                continue
-            _res = _parse_resource_spec(_spec)
-            if _res.uri in _existing_uris:
-                continue  # YAML-declared resource takes precedence
-            _base = _res.name
-            _ctr = 1
-            while _res.name in _existing_names:
-                _res = ResourceConfig(
-                    name=f"{_base}_{_ctr}", uri=_res.uri, description=_res.description
-                )
-                _ctr += 1
-            config.resources.append(_res)
-            _existing_uris.add(_res.uri)
-            _existing_names.add(_res.name)
+    if env_resources:
+        # YAML-declared resources take precedence.
+        _merge_resources(config, (r.model_copy(deep=True) for r in env_resources))
 
     return config
 
@@ -808,12 +910,6 @@ def apply_cli_overrides(config: Config, args: "argparse.Namespace") -> Config:
         protocols = [p.strip().lower() for p in _cli_protocols.split(",") if p.strip()]
         config.security.allowed_protocols = protocols
 
-    _cli_depth = getattr(args, "max_path_depth", None)  # int from type=int
-    if _cli_depth is not None:
-        if _cli_depth <= 0:
-            raise ValueError(f"--max-path-depth must be > 0, got: {_cli_depth}")
-        config.security.max_path_depth = _cli_depth
-
     # --- Output / Export ---
     _cli_export_path = getattr(args, "export_path", None)
     if _cli_export_path is not None:
@@ -828,114 +924,33 @@ def apply_cli_overrides(config: Config, args: "argparse.Namespace") -> Config:
     if _cli_enable_export is not None:
         config.features.enable_export = _cli_enable_export
 
-    # --- Core Limits & Cache ---
-    def _cli_positive_int(value: int, flag_name: str) -> int:
-        if value <= 0:
-            raise ValueError(f"{flag_name} must be > 0, got: {value}")
-        return value
-
-    _cli_max_rows = getattr(args, "max_rows", None)
-    if _cli_max_rows is not None:
-        config.core.limits.max_rows_per_call = _cli_positive_int(_cli_max_rows, "--max-rows")
-
-    _cli_max_export_rows = getattr(args, "max_export_rows", None)
-    if _cli_max_export_rows is not None:
-        config.core.limits.max_export_rows = _cli_positive_int(
-            _cli_max_export_rows, "--max-export-rows"
-        )
-
+    # --- Core Cache ---
     _cli_cache_enabled = getattr(args, "cache_enabled", None)  # False or None
     if _cli_cache_enabled is not None:
         config.core.cache.enabled = _cli_cache_enabled
 
-    _cli_cache_size = getattr(args, "cache_size", None)
-    if _cli_cache_size is not None:
-        config.core.cache.file_cache_size = _cli_positive_int(_cli_cache_size, "--cache-size")
-
-    # --- Extended Analysis ---
-    def _cli_positive_float(value: float, flag_name: str) -> float:
-        if value <= 0:
-            raise ValueError(f"{flag_name} must be > 0, got: {value}")
-        return value
-
-    _cli_max_bins_1d = getattr(args, "max_bins_1d", None)
-    if _cli_max_bins_1d is not None:
-        config.extended.histogram.max_bins_1d = _cli_positive_int(_cli_max_bins_1d, "--max-bins-1d")
-
-    _cli_max_bins_2d = getattr(args, "max_bins_2d", None)
-    if _cli_max_bins_2d is not None:
-        config.extended.histogram.max_bins_2d = _cli_positive_int(_cli_max_bins_2d, "--max-bins-2d")
-
-    _cli_fitting_iters = getattr(args, "fitting_iterations", None)
-    if _cli_fitting_iters is not None:
-        config.extended.fitting_max_iterations = _cli_positive_int(
-            _cli_fitting_iters, "--fitting-iterations"
-        )
-
-    _cli_plot_dpi = getattr(args, "plot_dpi", None)
-    if _cli_plot_dpi is not None:
-        config.extended.plotting.dpi = _cli_positive_int(_cli_plot_dpi, "--plot-dpi")
-
-    _cli_plot_format = getattr(args, "plot_format", None)
-    if _cli_plot_format is not None:
-        if _cli_plot_format not in ("png", "pdf", "svg"):
-            raise ValueError(
-                f"--plot-format must be 'png', 'pdf', or 'svg', got: {_cli_plot_format!r}"
-            )
-        config.extended.plotting.default_format = _cli_plot_format
-
-    _cli_plot_width = getattr(args, "plot_width", None)
-    if _cli_plot_width is not None:
-        config.extended.plotting.figure_width = _cli_positive_float(_cli_plot_width, "--plot-width")
-
-    _cli_plot_height = getattr(args, "plot_height", None)
-    if _cli_plot_height is not None:
-        config.extended.plotting.figure_height = _cli_positive_float(
-            _cli_plot_height, "--plot-height"
-        )
-
     # --- Native ROOT Execution ---
-    _cli_root_timeout = getattr(args, "root_timeout", None)
-    if _cli_root_timeout is not None:
-        config.root_native.execution_timeout = _cli_positive_int(
-            _cli_root_timeout, "--root-timeout"
-        )
-
     _cli_root_workdir = getattr(args, "root_workdir", None)
     if _cli_root_workdir is not None:
         config.root_native.working_directory = _cli_root_workdir
 
-    _cli_root_max_output = getattr(args, "root_max_output", None)
-    if _cli_root_max_output is not None:
-        config.root_native.max_output_size = _cli_positive_int(
-            _cli_root_max_output, "--root-max-output"
-        )
-
-    _cli_root_max_code = getattr(args, "root_max_code", None)
-    if _cli_root_max_code is not None:
-        config.root_native.max_code_length = _cli_positive_int(
-            _cli_root_max_code, "--root-max-code"
-        )
+    # --- Numeric limits and plot format (security, core, extended, native ROOT) ---
+    # Validate every option before assigning any of them so that a bad flag
+    # never leaves these settings half-applied.
+    _staged: list[tuple[str, Any]] = []
+    for _arg, _flag, _path, _check in _CLI_CHECKED_OPTIONS:
+        _value = getattr(args, _arg, None)
+        if _value is None:
+            continue
+        _staged.append((_path, _check(_value, _flag)))
+    for _path, _value in _staged:
+        _SETTERS[_path](config, _value)
 
     # --- Remote Resources ---
     _cli_resource_specs = getattr(args, "resource", None)  # list from action="append"
     if _cli_resource_specs:
-        _existing_uris = {r.uri for r in config.resources}
-        _existing_names = {r.name for r in config.resources}
-        for _spec in _cli_resource_specs:
-            _res = _parse_resource_spec(_spec)
-            if _res.uri in _existing_uris:
-                continue  # YAML-declared or earlier env-var resource wins
-            _base = _res.name
-            _ctr = 1
-            while _res.name in _existing_names:
-                _res = ResourceConfig(
-                    name=f"{_base}_{_ctr}", uri=_res.uri, description=_res.description
-                )
-                _ctr += 1
-            config.resources.append(_res)
-            _existing_uris.add(_res.uri)
-            _existing_names.add(_res.name)
+        # YAML-declared or earlier env-var resources win.
+        _merge_resources(config, (_parse_resource_spec(s) for s in _cli_resource_specs))
 
     return config
 
@@ -1,5 +1,19 @@
 """Extended analysis functionality with scipy/matplotlib dependencies."""
 
-from . import analysis, tools
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import analysis, tools
 
 __all__ = ["analysis", "tools"]
+
+
+def __getattr__(name: str):
+    # Subpackages are imported on first access so that importing a light module
+    # such as ``extended.root_native`` does not pull in scipy and matplotlib.
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
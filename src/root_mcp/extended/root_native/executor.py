@@ -9,16 +9,18 @@ from __future__ import annotations
 import json
 import logging
 import os
+import signal
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 
 from .sandbox import CodeValidator, ValidationResult
-from root_mcp.common.root_availability import _build_root_env
+from root_mcp.common import root_availability
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +52,25 @@ def _set_result(value):
     _result["return_value"] = value
 
 
+def _file_signature(entry):
+    \"\"\"Stat fields that change when a file is rewritten or replaced.\"\"\"
+    st = entry.stat()
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _snapshot_outputs():
+    \"\"\"Map each file in the output dir to its signature (one scandir pass).\"\"\"
+    try:
+        with os.scandir(_output_dir) as _entries:
+            return {{_e.name: _file_signature(_e) for _e in _entries if _e.is_file()}}
+    except OSError:
+        return {{}}
+
+
+# Files already present (e.g. in a caller-supplied output_dir) are only
+# reported again if this run rewrites them.
+_outputs_before = _snapshot_outputs()
+
 try:
     # --- Begin user code ---
 {indented_code}
@@ -59,12 +80,10 @@ except Exception as _exc:
     _result["error"] = str(_exc)
     _result["traceback"] = traceback.format_exc()
 
-# Collect output files
-if os.path.isdir(_output_dir):
-    for _f in os.listdir(_output_dir):
-        _fpath = os.path.join(_output_dir, _f)
-        if os.path.isfile(_fpath):
-            _result["output_files"].append(_fpath)
+# Collect output files created or modified by the user code
+for _name, _signature in _snapshot_outputs().items():
+    if _outputs_before.get(_name) != _signature:
+        _result["output_files"].append(os.path.join(_output_dir, _name))
 
 # Write structured result to a known file
 _result_path = os.path.join({working_dir!r}, "_result.json")
@@ -73,6 +92,96 @@ with open(_result_path, "w") as _rf:
 """
 
 
+# Pipe read size for the output drain threads.
+_READ_CHUNK = 16 * 1024
+
+# Seconds the drain threads get to reach EOF once the child has exited.
+_DRAIN_GRACE = 2.0
+
+
+def _drain(stream: IO[bytes], limit: int, out: list[tuple[bytes, int]]) -> None:
+    """Read *stream* to EOF, keeping at most *limit* bytes.
+
+    The rest is read and discarded so the child never blocks on a full pipe.
+    Appends ``(kept bytes, total bytes seen)`` to *out*, even if reading fails
+    part way through.
+    """
+    kept = bytearray()
+    total = 0
+    try:
+        with stream:
+            while chunk := stream.read1(_READ_CHUNK):
+                total += len(chunk)
+                room = limit - len(kept)
+                if room > 0:
+                    kept += chunk[:room]
+    finally:
+        out.append((bytes(kept), total))
+
+
+def _decode_capped(data: bytes, total: int, limit: int) -> str:
+    """Decode drained output, appending a marker when it was cut at *limit*."""
+    text = data.decode("utf-8", errors="replace")
+    if total > limit:
+        text += f"\n... [truncated, {total} total bytes]"
+    return text
+
+
+def _kill_process_group(proc: subprocess.Popen[bytes]) -> None:
+    """SIGKILL *proc* and every process in its group, then reap *proc*."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # the whole group has already exited
+    proc.wait()
+
+
+def _run_capped(
+    args: list[str], *, timeout: float, cwd: str, env: dict[str, str], limit: int
+) -> subprocess.CompletedProcess[str]:
+    """Run *args*, streaming stdout/stderr into buffers of at most *limit* bytes.
+
+    Unlike ``subprocess.run(capture_output=True)``, memory use stays bounded
+    by *limit* however much the child prints.  The child starts a new session
+    (and process group), so on timeout anything it spawned is killed with it.
+
+    Raises
+    ------
+    subprocess.TimeoutExpired
+        If the child outlives *timeout*, or processes it started keep its
+        output pipes open for more than ``_DRAIN_GRACE`` seconds after it
+        exits; the whole process group is killed first.
+    """
+    proc = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=True,
+    )
+    out: list[tuple[bytes, int]] = []
+    err: list[tuple[bytes, int]] = []
+    readers = [
+        threading.Thread(target=_drain, args=(proc.stdout, limit, out), daemon=True),
+        threading.Thread(target=_drain, args=(proc.stderr, limit, err), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        proc.wait(timeout=timeout)
+        for reader in readers:
+            reader.join(_DRAIN_GRACE)
+            if reader.is_alive():
+                raise subprocess.TimeoutExpired(args, timeout)
+    except subprocess.TimeoutExpired:
+        _kill_process_group(proc)
+        raise
+    return subprocess.CompletedProcess(
+        args, proc.returncode, _decode_capped(*out[0], limit), _decode_capped(*err[0], limit)
+    )
+
+
 @dataclass
 class ExecutionResult:
     """Result of a PyROOT code execution."""
@@ -91,6 +200,14 @@ class ExecutionResult:
 class RootCodeExecutor:
     """Execute PyROOT code in an isolated subprocess.
 
+    Every call starts a fresh interpreter and pays the ``import ROOT`` cost
+    again. That is deliberate: ROOT keeps process-wide state (gROOT, open
+    files, canvases, JIT-declared C++ symbols) that one submission could leak
+    into the next, a crash in C++ code must not take down a shared worker,
+    and the timeout is enforced by killing the process. The per-call costs
+    that do not depend on isolation (environment, root-config lookups) are
+    computed once and reused.
+
     Parameters
     ----------
     execution_timeout : int
@@ -126,6 +243,8 @@ class RootCodeExecutor:
         ]
         self.working_directory = working_directory
         self.validator = validator or CodeValidator()
+        self._env: dict[str, str] | None = None
+        self._env_generation = -1
 
     def execute(
         self,
@@ -198,28 +317,26 @@ class RootCodeExecutor:
         # Step 4: Execute in subprocess
         start_time = time.monotonic()
         try:
-            proc = subprocess.run(
+            # Output beyond max_output_size is discarded as it streams in.
+            # No -S/-I: ROOT is found through site-packages (conda, pip) or
+            # the PYTHONPATH set by _build_env, which those flags disable.
+            proc = _run_capped(
                 [sys.executable, script_path],
-                capture_output=True,
-                text=True,
                 timeout=effective_timeout,
                 cwd=work_dir,
                 env=self._build_env(),
+                limit=self.max_output_size,
             )
             elapsed = time.monotonic() - start_time
 
-            # Truncate output if too large
-            stdout = self._truncate(proc.stdout)
-            stderr = self._truncate(proc.stderr)
-
             # Step 5: Read structured result
             result_path = os.path.join(work_dir, "_result.json")
             structured = self._read_result_file(result_path)
 
             exec_result = ExecutionResult(
                 status=structured.get("status", "error"),
-                stdout=stdout,
-                stderr=stderr,
+                stdout=proc.stdout,
+                stderr=proc.stderr,
                 return_value=structured.get("return_value"),
                 output_files=structured.get("output_files", []),
                 execution_time_seconds=round(elapsed, 3),
@@ -234,6 +351,7 @@ class RootCodeExecutor:
 
         except subprocess.TimeoutExpired:
             elapsed = time.monotonic() - start_time
+            self._cleanup_work_dir(work_dir, [])
             logger.warning(
                 "ROOT code execution timed out after %.1fs (limit: %ds)",
                 elapsed,
@@ -248,6 +366,7 @@ class RootCodeExecutor:
         except Exception as e:
             elapsed = time.monotonic() - start_time
             logger.error("ROOT code execution failed: %s", e)
+            self._cleanup_work_dir(work_dir, [])
             return ExecutionResult(
                 status="error",
                 execution_time_seconds=round(elapsed, 3),
@@ -256,17 +375,22 @@ class RootCodeExecutor:
             )
 
     def _build_env(self) -> dict[str, str]:
-        """Build environment variables for the subprocess."""
-        env = _build_root_env()  # includes PYTHONPATH with ROOT lib dir if needed
-        # Ensure ROOT batch mode (no GUI)
-        env["ROOT_BATCH"] = "1"
-        return env
-
-    def _truncate(self, text: str) -> str:
-        """Truncate text to max_output_size."""
-        if len(text) > self.max_output_size:
-            return text[: self.max_output_size] + f"\n... [truncated, {len(text)} total bytes]"
-        return text
+        """Build environment variables for the subprocess.
+
+        The environment is built on first use and reused until
+        :func:`root_mcp.common.root_availability.reset_cache` is called;
+        later changes to ``os.environ`` are not picked up before then.
+        Each call gets its own copy.
+        """
+        generation = root_availability._cache_generation
+        if self._env is None or self._env_generation != generation:
+            # includes PYTHONPATH with ROOT lib dir if needed
+            env = root_availability._build_root_env()
+            # Ensure ROOT batch mode (no GUI)
+            env["ROOT_BATCH"] = "1"
+            self._env = env
+            self._env_generation = generation
+        return dict(self._env)
 
     @staticmethod
     def _read_result_file(path: str) -> dict[str, Any]:
@@ -11,6 +11,8 @@ from __future__ import annotations
 import ast
 import logging
 from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import ClassVar
 
 logger = logging.getLogger(__name__)
 
@@ -132,6 +134,30 @@ ALLOWED_MODULES: frozenset[str] = frozenset(
 )
 
 
+# Sources longer than this are parsed afresh rather than memoised, so the
+# parse cache cannot pin large submissions (or their ASTs) in memory.
+_PARSE_CACHE_MAX_LENGTH = 4096
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(code: str) -> ast.Module:
+    # ast.parse defaults are already the lean ones (type_comments=False, exec
+    # mode). feature_version is left unpinned: it only narrows the accepted
+    # grammar and does not make parsing cheaper.
+    return ast.parse(code)
+
+
+def _parse(code: str) -> ast.Module:
+    """Parse *code*, reusing the AST for short snippets seen before.
+
+    The returned tree may be shared between calls and must not be mutated.
+    ``SyntaxError`` propagates and is never cached.
+    """
+    if len(code) > _PARSE_CACHE_MAX_LENGTH:
+        return ast.parse(code)
+    return _parse_cached(code)
+
+
 @dataclass
 class ValidationResult:
     """Result of code validation."""
@@ -139,9 +165,13 @@ class ValidationResult:
     is_valid: bool
     errors: list[str] = field(default_factory=list)
     warnings: list[str] = field(default_factory=list)
+    #: Machine-readable codes for the errors, e.g. ``"blocked_module:os"``.
+    error_codes: set[str] = field(default_factory=set)
 
-    def add_error(self, msg: str) -> None:
+    def add_error(self, msg: str, code: str | None = None) -> None:
         self.errors.append(msg)
+        if code is not None:
+            self.error_codes.add(code)
         self.is_valid = False
 
     def add_warning(self, msg: str) -> None:
@@ -183,6 +213,12 @@ class CodeValidator:
         self.allowed_modules = allowed_modules or ALLOWED_MODULES
         self.max_code_length = max_code_length
 
+        # Bound once per instance so validate() skips the attribute lookups
+        self._node_checks = {
+            node_type: tuple(getattr(self, name) for name in names)
+            for node_type, names in self._NODE_CHECKS.items()
+        }
+
     def validate(self, code: str) -> ValidationResult:
         """Validate Python code for safety.
 
@@ -200,27 +236,31 @@ class CodeValidator:
 
         # Check code length
         if len(code) > self.max_code_length:
-            result.add_error(f"Code exceeds maximum length: {len(code)} > {self.max_code_length}")
+            result.add_error(
+                f"Code exceeds maximum length: {len(code)} > {self.max_code_length}", "too_long"
+            )
             return result
 
-        # Check for empty code
-        if not code.strip():
-            result.add_error("Empty code submitted")
+        # Check for empty code (isspace() scans in place; strip() would copy)
+        if not code or code.isspace():
+            result.add_error("Empty code submitted", "empty")
             return result
 
         # Parse AST
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
         except SyntaxError as e:
-            result.add_error(f"Syntax error: {e}")
+            result.add_error(f"Syntax error: {e}", "syntax")
             return result
 
-        # Walk the AST and check each node
+        # Walk the whole AST (a blocked call can hide in any expression), but
+        # only run the checks that apply to each node's type.
+        node_checks = self._node_checks
         for node in ast.walk(tree):
-            self._check_imports(node, result)
-            self._check_attributes(node, result)
-            self._check_calls(node, result)
-            self._check_open(node, result)
+            checks = node_checks.get(type(node))
+            if checks:
+                for check in checks:
+                    check(node, result)
 
         return result
 
@@ -228,38 +268,42 @@ class CodeValidator:
         """Check import statements for blocked modules."""
         if isinstance(node, ast.Import):
             for alias in node.names:
-                module_root = alias.name.split(".")[0]
-                if module_root in self.blocked_modules:
-                    result.add_error(
-                        f"Blocked import: '{alias.name}' "
-                        f"(module '{module_root}' is not allowed)"
-                    )
-                elif module_root not in self.allowed_modules:
-                    result.add_warning(f"Unknown module: '{alias.name}' — not in allowlist")
+                self._check_module(alias.name, f"'{alias.name}'", result)
 
         elif isinstance(node, ast.ImportFrom):
             if node.module:
-                module_root = node.module.split(".")[0]
-                if module_root in self.blocked_modules:
-                    result.add_error(
-                        f"Blocked import: 'from {node.module} import ...' "
-                        f"(module '{module_root}' is not allowed)"
-                    )
-                elif module_root not in self.allowed_modules:
-                    result.add_warning(f"Unknown module: '{node.module}' — not in allowlist")
+                self._check_module(node.module, f"'from {node.module} import ...'", result)
+
+    def _check_module(self, module: str, statement: str, result: ValidationResult) -> None:
+        """Classify one imported module by its top-level package."""
+        # Policy is per top-level package, so ``http.server`` and deeper paths
+        # resolve with one split and one lookup; no prefix matching is needed.
+        module_root = module.partition(".")[0]
+        if module_root in self.blocked_modules:
+            result.add_error(
+                f"Blocked import: {statement} (module '{module_root}' is not allowed)",
+                f"blocked_module:{module_root}",
+            )
+        elif module_root not in self.allowed_modules:
+            result.add_warning(f"Unknown module: '{module}' — not in allowlist")
 
     def _check_attributes(self, node: ast.AST, result: ValidationResult) -> None:
         """Check for blocked attribute accesses."""
         if isinstance(node, ast.Attribute):
             if node.attr in self.blocked_attributes:
-                result.add_error(f"Blocked attribute access: '.{node.attr}'")
+                result.add_error(
+                    f"Blocked attribute access: '.{node.attr}'", f"blocked_attribute:{node.attr}"
+                )
 
     def _check_calls(self, node: ast.AST, result: ValidationResult) -> None:
         """Check for blocked built-in function calls."""
         if isinstance(node, ast.Call):
             if isinstance(node.func, ast.Name):
                 if node.func.id in self.blocked_builtins:
-                    result.add_error(f"Blocked built-in call: '{node.func.id}()'")
+                    result.add_error(
+                        f"Blocked built-in call: '{node.func.id}()'",
+                        f"blocked_builtin:{node.func.id}",
+                    )
 
     def _check_open(self, node: ast.AST, result: ValidationResult) -> None:
         """Check open() calls — allowed but warned about."""
@@ -270,3 +314,12 @@ class CodeValidator:
                     "Code uses open() — file access is allowed but limited "
                     "to the working directory at runtime"
                 )
+
+    # Check method names to run per AST node type; every other node type needs
+    # none.  Names (not functions) so subclass overrides are honoured.
+    _NODE_CHECKS: ClassVar[dict[type[ast.AST], tuple[str, ...]]] = {
+        ast.Import: ("_check_imports",),
+        ast.ImportFrom: ("_check_imports",),
+        ast.Attribute: ("_check_attributes",),
+        ast.Call: ("_check_calls", "_check_open"),
+    }
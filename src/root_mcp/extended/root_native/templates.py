@@ -3,13 +3,87 @@
 Templates generate Python/PyROOT code strings that can be passed to
 RootCodeExecutor.execute(). Each template function returns a complete,
 runnable Python script as a string.
+
+Generated scripts contain no asserts or docstrings, so running them under
+``python -O``/``-OO`` would change nothing; the executor does not pass those
+flags because they would also strip asserts from user-submitted code.
 """
 
 from __future__ import annotations
 
 import json
+from functools import lru_cache
+
+# Templates keyed by a few small scalars are memoized: the generated script is
+# a pure function of the arguments and callers never mutate the returned str.
+# root_file_write and rdataframe_snapshot take lists/dicts (root_file_write
+# embeds whole data columns) and root_macro embeds arbitrary user C++, so
+# caching those would pin large payloads; they are deliberately left uncached.
+# The caches are typed: 50 and 50.0 (or 1 and True) render differently, and
+# tool arguments arrive as untyped client JSON.
+_TEMPLATE_CACHE_SIZE = 128
+
+# Lines shared by every template that runs in ROOT batch mode.  Results are
+# printed with the stdlib json module: payloads are a few summary fields, the
+# child interpreter is only guaranteed to have ROOT, and json.dumps keeps
+# NaN/inf from failed fits visible where faster encoders would emit null.
+_PREAMBLE = (
+    "import ROOT",
+    "import json",
+    "",
+    "ROOT.gROOT.SetBatch(True)",
+    "",
+)
+
+# Inputs read over the network; see _remote_read_setup
+_REMOTE_SCHEMES = ("root://", "roots://", "xroot://", "http://", "https://")
+
+
+def _remote_read_setup(file_path: str) -> list[str]:
+    """Return script lines that tune ROOT I/O for a remote input file.
+
+    For XRootD/HTTP inputs, TTreeCache prefetching is switched to
+    asynchronous mode so the next cluster is fetched while the current one
+    is processed. It must be set before the file is opened. Local files
+    need nothing. Templates emit this only when called with ``prefetch=True``.
+    """
+    if not file_path.lower().startswith(_REMOTE_SCHEMES):
+        return []
+    return [
+        "# Remote input: prefetch the next cluster while processing this one",
+        'ROOT.gEnv.SetValue("TFile.AsyncPrefetching", 1)',
+    ]
 
 
+# Fit, then report the fitted parameters as JSON (roofit_fit)
+_ROOFIT_REPORT = (
+    "# Perform fit",
+    "fit_result = model.fitTo(data, ROOT.RooFit.Save(), ROOT.RooFit.PrintLevel(-1))",
+    "",
+    "# Extract parameters",
+    "params = fit_result.floatParsFinal()",
+    "param_dict = {}",
+    "for i in range(params.getSize()):",
+    "    p = params.at(i)",
+    "    param_dict[p.GetName()] = {",
+    '        "value": p.getVal(),',
+    '        "error": p.getError(),',
+    '        "min": p.getMin(),',
+    '        "max": p.getMax(),',
+    "    }",
+    "",
+    "result = {",
+    '    "status": fit_result.status(),',
+    '    "cov_quality": fit_result.covQual(),',
+    '    "edm": fit_result.edm(),',
+    '    "min_nll": fit_result.minNll(),',
+    '    "parameters": param_dict,',
+    "}",
+    "print(json.dumps(result))",
+)
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE, typed=True)
 def rdataframe_histogram(
     file_path: str,
     tree_name: str,
@@ -20,6 +94,8 @@ def rdataframe_histogram(
     selection: str | None = None,
     weight: str | None = None,
     output_path: str | None = None,
+    multithreaded: bool = True,
+    prefetch: bool = False,
 ) -> str:
     """Generate RDataFrame code to compute a 1D histogram.
 
@@ -41,20 +117,25 @@ def rdataframe_histogram(
         Optional weight column name.
     output_path : str | None
         If provided, save histogram as PNG to this path.
+    multithreaded : bool
+        Enable ROOT implicit multi-threading so the event loop runs on all
+        cores. The histogram is independent of processing order.
+    prefetch : bool
+        For XRootD/HTTP inputs, fetch the next TTreeCache cluster
+        asynchronously while the current one is processed. Off by default;
+        local paths ignore it.
 
     Returns
     -------
     str
         Complete Python script.
     """
-    lines = [
-        "import ROOT",
-        "import json",
-        "",
-        "ROOT.gROOT.SetBatch(True)",
-        "",
-        f"rdf = ROOT.RDataFrame({tree_name!r}, {file_path!r})",
-    ]
+    lines = [*_PREAMBLE]
+    if multithreaded:
+        lines.append("ROOT.EnableImplicitMT()")
+    if prefetch:
+        lines.extend(_remote_read_setup(file_path))
+    lines.append(f"rdf = ROOT.RDataFrame({tree_name!r}, {file_path!r})")
 
     if selection:
         lines.append(f"rdf = rdf.Filter({selection!r})")
@@ -105,6 +186,8 @@ def rdataframe_snapshot(
     output_path: str,
     output_tree_name: str | None = None,
     selection: str | None = None,
+    multithreaded: bool = False,
+    prefetch: bool = False,
 ) -> str:
     """Generate RDataFrame code to write a filtered/selected subset to a new ROOT file.
 
@@ -122,6 +205,13 @@ def rdataframe_snapshot(
         Output tree name (defaults to input tree name).
     selection : str | None
         Optional cut expression.
+    multithreaded : bool
+        Enable ROOT implicit multi-threading. Off by default because a
+        multi-threaded Snapshot does not preserve the input entry order.
+    prefetch : bool
+        For XRootD/HTTP inputs, fetch the next TTreeCache cluster
+        asynchronously while the current one is processed. Off by default;
+        local paths ignore it.
 
     Returns
     -------
@@ -130,14 +220,12 @@ def rdataframe_snapshot(
     """
     out_tree = output_tree_name or tree_name
     branch_vec = "ROOT.std.vector['string']()"
-    lines = [
-        "import ROOT",
-        "import json",
-        "",
-        "ROOT.gROOT.SetBatch(True)",
-        "",
-        f"rdf = ROOT.RDataFrame({tree_name!r}, {file_path!r})",
-    ]
+    lines = [*_PREAMBLE]
+    if multithreaded:
+        lines.append("ROOT.EnableImplicitMT()")
+    if prefetch:
+        lines.extend(_remote_read_setup(file_path))
+    lines.append(f"rdf = ROOT.RDataFrame({tree_name!r}, {file_path!r})")
 
     if selection:
         lines.append(f"rdf = rdf.Filter({selection!r})")
@@ -172,6 +260,7 @@ def rdataframe_snapshot(
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE, typed=True)
 def tcanvas_plot(
     file_path: str,
     tree_name: str,
@@ -181,6 +270,7 @@ def tcanvas_plot(
     title: str | None = None,
     width: int = 800,
     height: int = 600,
+    prefetch: bool = False,
 ) -> str:
     """Generate TTree::Draw + TCanvas code to create a plot.
 
@@ -200,18 +290,23 @@ def tcanvas_plot(
         Plot title.
     width, height : int
         Canvas dimensions in pixels.
+    prefetch : bool
+        For XRootD/HTTP inputs, fetch the next TTreeCache cluster
+        asynchronously while the current one is processed. Off by default;
+        local paths ignore it.
 
     Returns
     -------
     str
         Complete Python script.
     """
+    # No explicit SetCacheSize/AddBranchToCache("*"): TTreeCache is on by
+    # default and learns the branches Draw reads, whereas "*" would also
+    # prefetch every branch the expression never touches.  RDataFrame (the
+    # other templates) configures its own cache per event-loop range.
     lines = [
-        "import ROOT",
-        "import json",
-        "",
-        "ROOT.gROOT.SetBatch(True)",
-        "",
+        *_PREAMBLE,
+        *(_remote_read_setup(file_path) if prefetch else ()),
         f"f = ROOT.TFile.Open({file_path!r})",
         f"t = f.Get({tree_name!r})",
         "",
@@ -251,6 +346,7 @@ def tcanvas_plot(
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE, typed=True)
 def roofit_fit(
     file_path: str,
     workspace_name: str,
@@ -279,40 +375,14 @@ def roofit_fit(
         Complete Python script.
     """
     lines = [
-        "import ROOT",
-        "import json",
-        "",
-        "ROOT.gROOT.SetBatch(True)",
-        "",
+        *_PREAMBLE,
         f"f = ROOT.TFile.Open({file_path!r})",
         f"w = f.Get({workspace_name!r})",
         "",
         f"model = w.pdf({model_name!r})",
         f"data = w.data({data_name!r})",
         "",
-        "# Perform fit",
-        "fit_result = model.fitTo(data, ROOT.RooFit.Save(), ROOT.RooFit.PrintLevel(-1))",
-        "",
-        "# Extract parameters",
-        "params = fit_result.floatParsFinal()",
-        "param_dict = {}",
-        "for i in range(params.getSize()):",
-        "    p = params.at(i)",
-        "    param_dict[p.GetName()] = {",
-        '        "value": p.getVal(),',
-        '        "error": p.getError(),',
-        '        "min": p.getMin(),',
-        '        "max": p.getMax(),',
-        "    }",
-        "",
-        "result = {",
-        '    "status": fit_result.status(),',
-        '    "cov_quality": fit_result.covQual(),',
-        '    "edm": fit_result.edm(),',
-        '    "min_nll": fit_result.minNll(),',
-        '    "parameters": param_dict,',
-        "}",
-        "print(json.dumps(result))",
+        *_ROOFIT_REPORT,
     ]
 
     if output_path:
@@ -360,13 +430,7 @@ def root_file_write(
         Complete Python script.
     """
     data_json = json.dumps(data)
-    lines = [
-        "import ROOT",
-        "import json",
-        "import array",
-        "",
-        f"data = json.loads({data_json!r})",
-        "",
+    fill_loop = [
         f'f = ROOT.TFile({output_path!r}, "RECREATE")',
         f"t = ROOT.TTree({tree_name!r}, {tree_name!r})",
         "",
@@ -377,7 +441,6 @@ def root_file_write(
         '    t.Branch(name, buffers[name], f"{name}/D")',
         "",
         "# Fill tree",
-        "n_entries = len(next(iter(data.values())))",
         "for i in range(n_entries):",
         "    for name in data:",
         "        buffers[name][0] = data[name][i]",
@@ -385,16 +448,52 @@ def root_file_write(
         "",
         "t.Write()",
         "f.Close()",
+    ]
+    lines = [
+        "import ROOT",
+        "import json",
+        "import array",
+        "",
+        f"data = json.loads({data_json!r})",
+        "n_entries = len(next(iter(data.values())))",
         "",
-        "result = {",
-        f'    "output_file": {output_path!r},',
-        f'    "tree_name": {tree_name!r},',
-        '    "entries": n_entries,',
-        '    "branches": list(data.keys()),',
-        "}",
-        "print(json.dumps(result))",
     ]
 
+    if len({len(values) for values in data.values()}) == 1:
+        # Equal-length columns: write them in one columnar Snapshot instead
+        # of a Python-level Fill per entry.  RDF.FromNumpy needs ROOT >= 6.28
+        # with numpy, so keep the per-entry loop as the fallback.
+        lines.extend(
+            [
+                "try:",
+                "    import numpy as np",
+                "    from_numpy = ROOT.RDF.FromNumpy",
+                "except (ImportError, AttributeError):",
+                "    from_numpy = None",
+                "",
+                "if from_numpy is not None:",
+                "    columns = {k: np.asarray(v, dtype=np.float64) for k, v in data.items()}",
+                f"    from_numpy(columns).Snapshot({tree_name!r}, {output_path!r})",
+                "else:",
+                *(f"    {line}" if line else "" for line in fill_loop),
+            ]
+        )
+    else:
+        lines.extend(fill_loop)
+
+    lines.extend(
+        [
+            "",
+            "result = {",
+            f'    "output_file": {output_path!r},',
+            f'    "tree_name": {tree_name!r},',
+            '    "entries": n_entries,',
+            '    "branches": list(data.keys()),',
+            "}",
+            "print(json.dumps(result))",
+        ]
+    )
+
     return "\n".join(lines)
 
 
@@ -429,11 +528,7 @@ def root_macro(
     escaped = wrapped.replace("\\", "\\\\").replace('"', '\\"')
 
     lines = [
-        "import ROOT",
-        "import json",
-        "",
-        "ROOT.gROOT.SetBatch(True)",
-        "",
+        *_PREAMBLE,
         f'ROOT.gROOT.ProcessLine("{escaped}")',
     ]
 
@@ -1,11 +1,34 @@
 """Extended MCP tools for analysis operations."""
 
-from .analysis import AnalysisTools
-from .plotting import PlottingTools
-from .root_native import RootNativeTools
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .analysis import AnalysisTools
+    from .plotting import PlottingTools
+    from .root_native import RootNativeTools
+
+_EXPORTS = {
+    "AnalysisTools": ".analysis",
+    "PlottingTools": ".plotting",
+    "RootNativeTools": ".root_native",
+}
 
 __all__ = [
     "AnalysisTools",
     "PlottingTools",
     "RootNativeTools",
 ]
+
+
+def __getattr__(name: str):
+    # Resolved on first access: the analysis and plotting tools import scipy and
+    # matplotlib, which the native ROOT tools do not need.
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -91,6 +91,10 @@ class RootNativeTools:
             response["hint"] = self._error_hint(result)
         if result.traceback:
             response["traceback"] = result.traceback
+        if result.validation and result.validation.error_codes:
+            # Stable identifiers so clients can classify failures without
+            # parsing the human-readable error message
+            response["error_codes"] = sorted(result.validation.error_codes)
         if result.validation and result.validation.warnings:
             response["warnings"] = result.validation.warnings
 
@@ -237,6 +241,21 @@ class RootNativeTools:
         if not isinstance(result, ExecutionResult):
             return ""
 
+        if result.status == "validation_failed" and result.validation is not None:
+            codes = result.validation.error_codes
+            if "syntax" in codes:
+                return (
+                    "Python syntax error in submitted code. "
+                    "Check for typos or incorrect indentation."
+                )
+            if "too_long" in codes:
+                return "Code exceeds the maximum length. Split the analysis into smaller runs."
+            if any(code.startswith("blocked_") for code in codes):
+                return (
+                    "Code uses modules, attributes or built-ins blocked by the sandbox "
+                    "(see error_codes). Remove them; write output files to _output_dir."
+                )
+
         error = result.error or ""
         stderr = result.stderr or ""
         combined = error + " " + stderr
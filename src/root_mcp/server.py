@@ -13,7 +13,7 @@ from mcp.types import Resource, Tool, TextContent
 from mcp.server.stdio import stdio_server
 
 from root_mcp.config import Config, load_config, _CONFIG_TEMPLATE
-from root_mcp.common.root_availability import is_root_available, get_root_version, get_root_features
+from root_mcp.common.root_availability import get_root_probe, get_root_version, is_root_available
 from root_mcp.core.io import FileManager, PathValidator, TreeReader, HistogramReader, DataExporter
 from root_mcp.core.operations import BasicStatistics
 from root_mcp.core.tools import DiscoveryTools, DataAccessTools
@@ -825,17 +825,26 @@ class ROOTMCPServer:
 
     def _register_tools(self) -> None:
         """Register all MCP tools based on current mode."""
+        # Tool schemas are static, so each visible combination is built once;
+        # clients typically call list_tools on every (re)connection.
+        tool_lists: dict[tuple[bool, bool], list[Tool]] = {}
 
         @self.server.list_tools()
         async def list_tools() -> list[Tool]:
             """List available tools based on current mode."""
-            tools = self._get_core_tools()
+            extended = self.current_mode == "extended" and self._extended_components_loaded
+            key = (extended, self._root_native_available)
+            tools = tool_lists.get(key)
+            if tools is None:
+                tools = self._get_core_tools()
 
-            if self.current_mode == "extended" and self._extended_components_loaded:
-                tools.extend(self._get_extended_tools())
+                if extended:
+                    tools.extend(self._get_extended_tools())
 
-            if self._root_native_available:
-                tools.extend(self._get_root_native_tools())
+                if self._root_native_available:
+                    tools.extend(self._get_root_native_tools())
+
+                tool_lists[key] = tools
 
             return tools
 
@@ -849,18 +858,19 @@ class ROOTMCPServer:
                 if name == "switch_mode":
                     result = self.switch_mode(arguments["mode"])
                 elif name == "get_server_info":
+                    root_probe = get_root_probe()
                     result = {
                         "server_name": self.config.server.name,
                         "version": self.config.server.version,
                         "current_mode": self.current_mode,
                         "extended_components_loaded": self._extended_components_loaded,
                         "available_modes": ["core", "extended"],
-                        "root_native_available": is_root_available(),
+                        "root_native_available": root_probe.available,
                         "root_native_enabled": (
-                            self.config.features.enable_root and is_root_available()
+                            self.config.features.enable_root and root_probe.available
                         ),
-                        "root_version": get_root_version(),
-                        "root_features": get_root_features(),
+                        "root_version": root_probe.version,
+                        "root_features": root_probe.features,
                     }
 
                 # Core tools (always available)
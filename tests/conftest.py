@@ -0,0 +1,21 @@
+"""Shared fixtures for the test suite."""
+
+from __future__ import annotations
+
+import pytest
+
+from root_mcp.config import Config, RootNativeConfig
+from root_mcp.extended.tools.root_native import RootNativeTools
+
+
+@pytest.fixture(scope="module")
+def native_tools(tmp_path_factory):
+    # Validated once per module; every execution gets its own exec_* dir
+    # inside the shared working directory, so the tests do not interfere.
+    config = Config(
+        root_native=RootNativeConfig(
+            execution_timeout=10,
+            working_directory=str(tmp_path_factory.mktemp("root_native")),
+        )
+    )
+    return RootNativeTools(config=config)
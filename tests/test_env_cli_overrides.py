@@ -8,8 +8,9 @@ YAML-independent baseline.
 
 from __future__ import annotations
 
-import argparse
+from dataclasses import dataclass
 import logging as _logging
+from operator import attrgetter
 import os
 import pytest
 
@@ -26,44 +27,59 @@ from root_mcp.config import (
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def _clean_root_mcp_env(monkeypatch):
+    """Scrub every ``ROOT_MCP_*`` variable so each test starts from an empty env layer."""
+    for key in [k for k in os.environ if k.startswith("ROOT_MCP_")]:
+        monkeypatch.delenv(key, raising=False)
+
+
 def _default_config() -> Config:
     """Return a Config built entirely from Pydantic defaults (no YAML)."""
+    # Building afresh is cheaper than deep-copying a shared template: with the
+    # package version lookup cached, Config() costs a fraction of a deepcopy.
     return Config()
 
 
-def _make_args(**kwargs) -> argparse.Namespace:
-    """Build a minimal Namespace with all attributes set to None,
-    then override with any kwargs supplied by the caller."""
-    defaults = dict(
-        mode=None,
-        server_name=None,
-        allowed_root=None,
-        allow_remote=None,
-        allowed_protocols=None,
-        max_path_depth=None,
-        export_path=None,
-        export_formats=None,
-        enable_export=None,
-        max_rows=None,
-        max_export_rows=None,
-        cache_enabled=None,
-        cache_size=None,
-        max_bins_1d=None,
-        max_bins_2d=None,
-        fitting_iterations=None,
-        plot_dpi=None,
-        plot_format=None,
-        plot_width=None,
-        plot_height=None,
-        root_timeout=None,
-        root_workdir=None,
-        root_max_output=None,
-        root_max_code=None,
-        resource=None,
-        log_level=None,
-    )
-    defaults.update(kwargs)
-    return argparse.Namespace(**defaults)
+@dataclass(slots=True)
+class _ArgsStub:
+    """Fixed-shape stand-in for the Namespace built by the server's argument parser.
+
+    Every option defaults to ``None`` ("flag not given"), matching argparse.
+    """
+
+    mode: str | None = None
+    server_name: str | None = None
+    allowed_root: list[str] | None = None
+    allow_remote: bool | None = None
+    allowed_protocols: str | None = None
+    max_path_depth: int | None = None
+    export_path: str | None = None
+    export_formats: str | None = None
+    enable_export: bool | None = None
+    max_rows: int | None = None
+    max_export_rows: int | None = None
+    cache_enabled: bool | None = None
+    cache_size: int | None = None
+    max_bins_1d: int | None = None
+    max_bins_2d: int | None = None
+    fitting_iterations: int | None = None
+    plot_dpi: int | None = None
+    plot_format: str | None = None
+    plot_width: float | None = None
+    plot_height: float | None = None
+    root_timeout: int | None = None
+    root_workdir: str | None = None
+    root_max_output: int | None = None
+    root_max_code: int | None = None
+    resource: list[str] | None = None
+    log_level: str | None = None
+
+
+#: Build an args object with every option unset except the given keywords.
+#: An alias rather than a wrapper, so keywords go straight to the generated
+#: ``__init__`` (and unknown option names still raise ``TypeError``).
+_make_args = _ArgsStub
 
 
 # ---------------------------------------------------------------------------
@@ -91,8 +107,9 @@ def test_env_mode_invalid(monkeypatch):
     """An unrecognised mode value raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MODE", "invalid")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_MODE"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_MODE" in str(excinfo.value)
 
 
 def test_env_mode_empty_is_noop(monkeypatch):
@@ -103,9 +120,8 @@ def test_env_mode_empty_is_noop(monkeypatch):
     assert config.server.mode == "extended"
 
 
-def test_env_mode_unset_is_noop(monkeypatch):
+def test_env_mode_unset_is_noop():
     """A missing ROOT_MCP_MODE leaves the default ('extended') untouched."""
-    monkeypatch.delenv("ROOT_MCP_MODE", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.server.mode == "extended"
@@ -140,9 +156,8 @@ def test_env_server_name_empty_is_noop(monkeypatch):
     assert config.server.name == "root-mcp"
 
 
-def test_env_server_name_unset_is_noop(monkeypatch):
+def test_env_server_name_unset_is_noop():
     """A missing ROOT_MCP_SERVER_NAME leaves the default name unchanged."""
-    monkeypatch.delenv("ROOT_MCP_SERVER_NAME", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.server.name == "root-mcp"
@@ -161,15 +176,25 @@ def test_env_server_name_whitespace_stripped(monkeypatch):
 # ---------------------------------------------------------------------------
 
 
-def test_env_overrides_returns_same_object(monkeypatch):
+def test_env_overrides_returns_same_object():
     """`apply_env_overrides` returns the identical Config instance."""
-    monkeypatch.delenv("ROOT_MCP_MODE", raising=False)
-    monkeypatch.delenv("ROOT_MCP_SERVER_NAME", raising=False)
     config = _default_config()
     result = apply_env_overrides(config)
     assert result is config
 
 
+def test_env_overrides_repeated_calls_do_not_share_state(monkeypatch):
+    """Re-applying an unchanged env gives each Config its own lists and resources."""
+    monkeypatch.setenv("ROOT_MCP_ALLOWED_PROTOCOLS", "file,root")
+    monkeypatch.setenv("ROOT_MCP_RESOURCES", "cms=root://host//cms")
+    first = apply_env_overrides(_default_config())
+    second = apply_env_overrides(_default_config())
+    assert first.security.allowed_protocols == second.security.allowed_protocols
+    assert first.security.allowed_protocols is not second.security.allowed_protocols
+    first.resources[0].allowed_patterns.append("*.txt")
+    assert second.resources[0].allowed_patterns == ["*.root"]
+
+
 # ---------------------------------------------------------------------------
 # apply_cli_overrides : server.mode
 # ---------------------------------------------------------------------------
@@ -199,8 +224,9 @@ def test_cli_mode_none_is_noop():
 def test_cli_mode_invalid():
     """An invalid --mode value raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--mode"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(mode="turbo"))
+    assert "--mode" in str(excinfo.value)
 
 
 # ---------------------------------------------------------------------------
@@ -313,9 +339,8 @@ def test_env_allowed_roots_empty_items_skipped(monkeypatch, tmp_path):
     assert config.security.allowed_roots == [p]
 
 
-def test_env_allowed_roots_unset_is_noop(monkeypatch):
+def test_env_allowed_roots_unset_is_noop():
     """Missing ROOT_MCP_ALLOWED_ROOTS leaves allowed_roots unchanged."""
-    monkeypatch.delenv("ROOT_MCP_ALLOWED_ROOTS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.security.allowed_roots == []
@@ -345,9 +370,8 @@ def test_env_allow_remote_false_values(monkeypatch, val):
     assert config.security.allow_remote is False
 
 
-def test_env_allow_remote_unset_is_noop(monkeypatch):
+def test_env_allow_remote_unset_is_noop():
     """Missing ROOT_MCP_ALLOW_REMOTE leaves allow_remote unchanged."""
-    monkeypatch.delenv("ROOT_MCP_ALLOW_REMOTE", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.security.allow_remote is False
@@ -383,9 +407,8 @@ def test_env_allowed_protocols_replaces_existing(monkeypatch):
     assert config.security.allowed_protocols == ["root"]
 
 
-def test_env_allowed_protocols_unset_is_noop(monkeypatch):
+def test_env_allowed_protocols_unset_is_noop():
     """Missing ROOT_MCP_ALLOWED_PROTOCOLS leaves allowed_protocols unchanged."""
-    monkeypatch.delenv("ROOT_MCP_ALLOWED_PROTOCOLS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.security.allowed_protocols == ["file"]
@@ -408,21 +431,22 @@ def test_env_max_path_depth_non_integer_raises(monkeypatch):
     """A non-integer ROOT_MCP_MAX_PATH_DEPTH raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_PATH_DEPTH", "abc")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_MAX_PATH_DEPTH"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_MAX_PATH_DEPTH" in str(excinfo.value)
 
 
 def test_env_max_path_depth_zero_raises(monkeypatch):
     """ROOT_MCP_MAX_PATH_DEPTH=0 raises ValueError (must be > 0)."""
     monkeypatch.setenv("ROOT_MCP_MAX_PATH_DEPTH", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_max_path_depth_unset_is_noop(monkeypatch):
+def test_env_max_path_depth_unset_is_noop():
     """Missing ROOT_MCP_MAX_PATH_DEPTH leaves max_path_depth at its default (10)."""
-    monkeypatch.delenv("ROOT_MCP_MAX_PATH_DEPTH", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.security.max_path_depth == 10
@@ -477,7 +501,7 @@ def test_cli_allow_remote_none_is_noop():
     assert config.security.allow_remote is False
 
 
-def test_cli_allowed_protocols_comma(monkeypatch):
+def test_cli_allowed_protocols_comma():
     """--allowed-protocols with a comma-string is split and lowercased."""
     config = _default_config()
     apply_cli_overrides(config, _make_args(allowed_protocols="file,root,xrootd"))
@@ -501,8 +525,9 @@ def test_cli_max_path_depth():
 def test_cli_max_path_depth_zero_raises():
     """--max-path-depth 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(max_path_depth=0))
+    assert "> 0" in str(excinfo.value)
 
 
 def test_cli_max_path_depth_none_is_noop():
@@ -576,9 +601,8 @@ def test_env_export_path_relative_resolved(monkeypatch, tmp_path, monkeypatch_cw
     assert pathlib.Path(config.output.export_base_path).is_absolute()
 
 
-def test_env_export_path_unset_is_noop(monkeypatch):
+def test_env_export_path_unset_is_noop():
     """Missing ROOT_MCP_EXPORT_PATH leaves default unchanged."""
-    monkeypatch.delenv("ROOT_MCP_EXPORT_PATH", raising=False)
     config = _default_config()
     default = config.output.export_base_path
     apply_env_overrides(config)
@@ -624,9 +648,8 @@ def test_env_export_formats_replaces_existing(monkeypatch):
     assert config.output.allowed_formats == ["json"]
 
 
-def test_env_export_formats_unset_is_noop(monkeypatch):
+def test_env_export_formats_unset_is_noop():
     """Missing ROOT_MCP_EXPORT_FORMATS leaves allowed_formats at default."""
-    monkeypatch.delenv("ROOT_MCP_EXPORT_FORMATS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert set(config.output.allowed_formats) == {"json", "csv", "parquet"}
@@ -656,9 +679,8 @@ def test_env_enable_export_false_values(monkeypatch, val):
     assert config.features.enable_export is False
 
 
-def test_env_enable_export_unset_is_noop(monkeypatch):
+def test_env_enable_export_unset_is_noop():
     """Missing ROOT_MCP_ENABLE_EXPORT leaves enable_export at default (True)."""
-    monkeypatch.delenv("ROOT_MCP_ENABLE_EXPORT", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.features.enable_export is True
@@ -773,21 +795,22 @@ def test_env_max_rows_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_MAX_ROWS raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_ROWS", "abc")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_MAX_ROWS"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_MAX_ROWS" in str(excinfo.value)
 
 
 def test_env_max_rows_zero_raises(monkeypatch):
     """ROOT_MCP_MAX_ROWS=0 raises ValueError (must be > 0)."""
     monkeypatch.setenv("ROOT_MCP_MAX_ROWS", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_max_rows_unset_is_noop(monkeypatch):
+def test_env_max_rows_unset_is_noop():
     """Missing ROOT_MCP_MAX_ROWS leaves max_rows_per_call at default (1_000_000)."""
-    monkeypatch.delenv("ROOT_MCP_MAX_ROWS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.core.limits.max_rows_per_call == 1_000_000
@@ -810,21 +833,22 @@ def test_env_max_export_rows_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_MAX_EXPORT_ROWS raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_EXPORT_ROWS", "lots")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_MAX_EXPORT_ROWS"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_MAX_EXPORT_ROWS" in str(excinfo.value)
 
 
 def test_env_max_export_rows_negative_raises(monkeypatch):
     """ROOT_MCP_MAX_EXPORT_ROWS=-1 raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_EXPORT_ROWS", "-1")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_max_export_rows_unset_is_noop(monkeypatch):
+def test_env_max_export_rows_unset_is_noop():
     """Missing ROOT_MCP_MAX_EXPORT_ROWS leaves default (10_000_000) unchanged."""
-    monkeypatch.delenv("ROOT_MCP_MAX_EXPORT_ROWS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.core.limits.max_export_rows == 10_000_000
@@ -854,9 +878,8 @@ def test_env_cache_false_values(monkeypatch, val):
     assert config.core.cache.enabled is False
 
 
-def test_env_cache_unset_is_noop(monkeypatch):
+def test_env_cache_unset_is_noop():
     """Missing ROOT_MCP_CACHE leaves cache.enabled at default (True)."""
-    monkeypatch.delenv("ROOT_MCP_CACHE", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.core.cache.enabled is True
@@ -879,21 +902,22 @@ def test_env_cache_size_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_CACHE_SIZE raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_CACHE_SIZE", "big")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_CACHE_SIZE"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_CACHE_SIZE" in str(excinfo.value)
 
 
 def test_env_cache_size_zero_raises(monkeypatch):
     """ROOT_MCP_CACHE_SIZE=0 raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_CACHE_SIZE", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_cache_size_unset_is_noop(monkeypatch):
+def test_env_cache_size_unset_is_noop():
     """Missing ROOT_MCP_CACHE_SIZE leaves file_cache_size at default (50)."""
-    monkeypatch.delenv("ROOT_MCP_CACHE_SIZE", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.core.cache.file_cache_size == 50
@@ -914,8 +938,9 @@ def test_cli_max_rows():
 def test_cli_max_rows_zero_raises():
     """--max-rows 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--max-rows"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(max_rows=0))
+    assert "--max-rows" in str(excinfo.value)
 
 
 def test_cli_max_rows_none_is_noop():
@@ -935,8 +960,9 @@ def test_cli_max_export_rows():
 def test_cli_max_export_rows_zero_raises():
     """--max-export-rows 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--max-export-rows"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(max_export_rows=0))
+    assert "--max-export-rows" in str(excinfo.value)
 
 
 def test_cli_max_export_rows_none_is_noop():
@@ -971,8 +997,9 @@ def test_cli_cache_size():
 def test_cli_cache_size_zero_raises():
     """--cache-size 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--cache-size"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(cache_size=0))
+    assert "--cache-size" in str(excinfo.value)
 
 
 def test_cli_cache_size_none_is_noop():
@@ -983,38 +1010,47 @@ def test_cli_cache_size_none_is_noop():
 
 
 # ---------------------------------------------------------------------------
-# Priority: CLI beats env var
-# ---------------------------------------------------------------------------
-
-
-def test_cli_max_rows_overrides_env(monkeypatch):
-    """CLI --max-rows wins over ROOT_MCP_MAX_ROWS."""
-    monkeypatch.setenv("ROOT_MCP_MAX_ROWS", "100")
-    config = _default_config()
-    apply_env_overrides(config)
-    assert config.core.limits.max_rows_per_call == 100
-    apply_cli_overrides(config, _make_args(max_rows=9999))
-    assert config.core.limits.max_rows_per_call == 9999
-
-
-def test_cli_no_cache_overrides_env_cache_true(monkeypatch):
-    """CLI --no-cache wins even when ROOT_MCP_CACHE=true."""
-    monkeypatch.setenv("ROOT_MCP_CACHE", "true")
-    config = _default_config()
-    apply_env_overrides(config)
-    assert config.core.cache.enabled is True
-    apply_cli_overrides(config, _make_args(cache_enabled=False))
-    assert config.core.cache.enabled is False
-
-
-def test_cli_cache_size_overrides_env(monkeypatch):
-    """CLI --cache-size wins over ROOT_MCP_CACHE_SIZE."""
-    monkeypatch.setenv("ROOT_MCP_CACHE_SIZE", "10")
+# Priority: CLI beats env var (core limits & cache, extended analysis)
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "env_name, env_val, arg, cli_val, path, env_expected, cli_expected",
+    [
+        ("ROOT_MCP_MAX_ROWS", "100", "max_rows", 9999, "core.limits.max_rows_per_call", 100, 9999),
+        ("ROOT_MCP_CACHE", "true", "cache_enabled", False, "core.cache.enabled", True, False),
+        ("ROOT_MCP_CACHE_SIZE", "10", "cache_size", 200, "core.cache.file_cache_size", 10, 200),
+        (
+            "ROOT_MCP_MAX_BINS_1D",
+            "100",
+            "max_bins_1d",
+            9999,
+            "extended.histogram.max_bins_1d",
+            100,
+            9999,
+        ),
+        (
+            "ROOT_MCP_PLOT_FORMAT",
+            "pdf",
+            "plot_format",
+            "svg",
+            "extended.plotting.default_format",
+            "pdf",
+            "svg",
+        ),
+        ("ROOT_MCP_PLOT_DPI", "72", "plot_dpi", 300, "extended.plotting.dpi", 72, 300),
+    ],
+)
+def test_cli_overrides_env(
+    monkeypatch, env_name, env_val, arg, cli_val, path, env_expected, cli_expected
+):
+    """A CLI flag wins over the matching ROOT_MCP_* env var."""
+    monkeypatch.setenv(env_name, env_val)
     config = _default_config()
     apply_env_overrides(config)
-    assert config.core.cache.file_cache_size == 10
-    apply_cli_overrides(config, _make_args(cache_size=200))
-    assert config.core.cache.file_cache_size == 200
+    assert attrgetter(path)(config) == env_expected
+    apply_cli_overrides(config, _make_args(**{arg: cli_val}))
+    assert attrgetter(path)(config) == cli_expected
 
 
 # ===========================================================================
@@ -1038,21 +1074,22 @@ def test_env_max_bins_1d_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_MAX_BINS_1D raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_BINS_1D", "many")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_MAX_BINS_1D"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_MAX_BINS_1D" in str(excinfo.value)
 
 
 def test_env_max_bins_1d_zero_raises(monkeypatch):
     """ROOT_MCP_MAX_BINS_1D=0 raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_MAX_BINS_1D", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_max_bins_1d_unset_is_noop(monkeypatch):
+def test_env_max_bins_1d_unset_is_noop():
     """Missing ROOT_MCP_MAX_BINS_1D leaves max_bins_1d at default (10_000)."""
-    monkeypatch.delenv("ROOT_MCP_MAX_BINS_1D", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.histogram.max_bins_1d == 10_000
@@ -1066,9 +1103,8 @@ def test_env_max_bins_2d(monkeypatch):
     assert config.extended.histogram.max_bins_2d == 200
 
 
-def test_env_max_bins_2d_unset_is_noop(monkeypatch):
+def test_env_max_bins_2d_unset_is_noop():
     """Missing ROOT_MCP_MAX_BINS_2D leaves max_bins_2d at default (1_000)."""
-    monkeypatch.delenv("ROOT_MCP_MAX_BINS_2D", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.histogram.max_bins_2d == 1_000
@@ -1091,13 +1127,13 @@ def test_env_fitting_iterations_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_FITTING_ITERATIONS raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_FITTING_ITERATIONS", "inf")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_FITTING_ITERATIONS"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_FITTING_ITERATIONS" in str(excinfo.value)
 
 
-def test_env_fitting_iterations_unset_is_noop(monkeypatch):
+def test_env_fitting_iterations_unset_is_noop():
     """Missing ROOT_MCP_FITTING_ITERATIONS leaves fitting_max_iterations at default."""
-    monkeypatch.delenv("ROOT_MCP_FITTING_ITERATIONS", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.fitting_max_iterations == 10_000
@@ -1120,13 +1156,13 @@ def test_env_plot_dpi_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_PLOT_DPI raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_PLOT_DPI", "high")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_PLOT_DPI"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_PLOT_DPI" in str(excinfo.value)
 
 
-def test_env_plot_dpi_unset_is_noop(monkeypatch):
+def test_env_plot_dpi_unset_is_noop():
     """Missing ROOT_MCP_PLOT_DPI leaves dpi at default (100)."""
-    monkeypatch.delenv("ROOT_MCP_PLOT_DPI", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.plotting.dpi == 100
@@ -1158,13 +1194,13 @@ def test_env_plot_format_invalid_raises(monkeypatch):
     """An unrecognised ROOT_MCP_PLOT_FORMAT raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_PLOT_FORMAT", "bmp")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_PLOT_FORMAT"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_PLOT_FORMAT" in str(excinfo.value)
 
 
-def test_env_plot_format_unset_is_noop(monkeypatch):
+def test_env_plot_format_unset_is_noop():
     """Missing ROOT_MCP_PLOT_FORMAT leaves default_format at 'png'."""
-    monkeypatch.delenv("ROOT_MCP_PLOT_FORMAT", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.plotting.default_format == "png"
@@ -1187,21 +1223,22 @@ def test_env_plot_width_invalid_raises(monkeypatch):
     """A non-numeric ROOT_MCP_PLOT_WIDTH raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_PLOT_WIDTH", "wide")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_PLOT_WIDTH"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_PLOT_WIDTH" in str(excinfo.value)
 
 
 def test_env_plot_width_zero_raises(monkeypatch):
     """ROOT_MCP_PLOT_WIDTH=0 raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_PLOT_WIDTH", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_plot_width_unset_is_noop(monkeypatch):
+def test_env_plot_width_unset_is_noop():
     """Missing ROOT_MCP_PLOT_WIDTH leaves figure_width at default (10.0)."""
-    monkeypatch.delenv("ROOT_MCP_PLOT_WIDTH", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.plotting.figure_width == pytest.approx(10.0)
@@ -1215,9 +1252,8 @@ def test_env_plot_height(monkeypatch):
     assert config.extended.plotting.figure_height == pytest.approx(8.0)
 
 
-def test_env_plot_height_unset_is_noop(monkeypatch):
+def test_env_plot_height_unset_is_noop():
     """Missing ROOT_MCP_PLOT_HEIGHT leaves figure_height at default (6.0)."""
-    monkeypatch.delenv("ROOT_MCP_PLOT_HEIGHT", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.extended.plotting.figure_height == pytest.approx(6.0)
@@ -1245,8 +1281,9 @@ def test_cli_max_bins_1d_none_is_noop():
 def test_cli_max_bins_1d_zero_raises():
     """--max-bins-1d 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--max-bins-1d"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(max_bins_1d=0))
+    assert "--max-bins-1d" in str(excinfo.value)
 
 
 def test_cli_max_bins_2d():
@@ -1280,8 +1317,9 @@ def test_cli_plot_dpi():
 def test_cli_plot_dpi_zero_raises():
     """--plot-dpi 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--plot-dpi"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(plot_dpi=0))
+    assert "--plot-dpi" in str(excinfo.value)
 
 
 def test_cli_plot_dpi_none_is_noop():
@@ -1302,8 +1340,9 @@ def test_cli_plot_format_valid(fmt):
 def test_cli_plot_format_invalid_raises():
     """An invalid --plot-format raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--plot-format"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(plot_format="tiff"))
+    assert "--plot-format" in str(excinfo.value)
 
 
 def test_cli_plot_format_none_is_noop():
@@ -1323,8 +1362,9 @@ def test_cli_plot_width():
 def test_cli_plot_width_zero_raises():
     """--plot-width 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--plot-width"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(plot_width=0.0))
+    assert "--plot-width" in str(excinfo.value)
 
 
 def test_cli_plot_width_none_is_noop():
@@ -1348,41 +1388,6 @@ def test_cli_plot_height_none_is_noop():
     assert config.extended.plotting.figure_height == pytest.approx(6.0)
 
 
-# ---------------------------------------------------------------------------
-# Priority: CLI beats env var
-# ---------------------------------------------------------------------------
-
-
-def test_cli_max_bins_1d_overrides_env(monkeypatch):
-    """CLI --max-bins-1d wins over ROOT_MCP_MAX_BINS_1D."""
-    monkeypatch.setenv("ROOT_MCP_MAX_BINS_1D", "100")
-    config = _default_config()
-    apply_env_overrides(config)
-    assert config.extended.histogram.max_bins_1d == 100
-    apply_cli_overrides(config, _make_args(max_bins_1d=9999))
-    assert config.extended.histogram.max_bins_1d == 9999
-
-
-def test_cli_plot_format_overrides_env(monkeypatch):
-    """CLI --plot-format wins over ROOT_MCP_PLOT_FORMAT."""
-    monkeypatch.setenv("ROOT_MCP_PLOT_FORMAT", "pdf")
-    config = _default_config()
-    apply_env_overrides(config)
-    assert config.extended.plotting.default_format == "pdf"
-    apply_cli_overrides(config, _make_args(plot_format="svg"))
-    assert config.extended.plotting.default_format == "svg"
-
-
-def test_cli_plot_dpi_overrides_env(monkeypatch):
-    """CLI --plot-dpi wins over ROOT_MCP_PLOT_DPI."""
-    monkeypatch.setenv("ROOT_MCP_PLOT_DPI", "72")
-    config = _default_config()
-    apply_env_overrides(config)
-    assert config.extended.plotting.dpi == 72
-    apply_cli_overrides(config, _make_args(plot_dpi=300))
-    assert config.extended.plotting.dpi == 300
-
-
 # ===========================================================================
 # Native ROOT Execution
 # ===========================================================================
@@ -1404,21 +1409,22 @@ def test_env_root_timeout_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_ROOT_TIMEOUT raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_ROOT_TIMEOUT", "forever")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_ROOT_TIMEOUT"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_ROOT_TIMEOUT" in str(excinfo.value)
 
 
 def test_env_root_timeout_zero_raises(monkeypatch):
     """ROOT_MCP_ROOT_TIMEOUT=0 raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_ROOT_TIMEOUT", "0")
     config = _default_config()
-    with pytest.raises(ValueError, match="> 0"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "> 0" in str(excinfo.value)
 
 
-def test_env_root_timeout_unset_is_noop(monkeypatch):
+def test_env_root_timeout_unset_is_noop():
     """Missing ROOT_MCP_ROOT_TIMEOUT leaves execution_timeout at default (60)."""
-    monkeypatch.delenv("ROOT_MCP_ROOT_TIMEOUT", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.root_native.execution_timeout == 60
@@ -1437,9 +1443,8 @@ def test_env_root_workdir(monkeypatch):
     assert config.root_native.working_directory == "/custom/workdir"
 
 
-def test_env_root_workdir_unset_is_noop(monkeypatch):
+def test_env_root_workdir_unset_is_noop():
     """Missing ROOT_MCP_ROOT_WORKDIR leaves working_directory at default."""
-    monkeypatch.delenv("ROOT_MCP_ROOT_WORKDIR", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.root_native.working_directory == "/tmp/root_mcp_native"
@@ -1462,13 +1467,13 @@ def test_env_root_max_output_invalid_raises(monkeypatch):
     """A non-integer ROOT_MCP_ROOT_MAX_OUTPUT raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_ROOT_MAX_OUTPUT", "big")
     config = _default_config()
-    with pytest.raises(ValueError, match="ROOT_MCP_ROOT_MAX_OUTPUT"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "ROOT_MCP_ROOT_MAX_OUTPUT" in str(excinfo.value)
 
 
-def test_env_root_max_output_unset_is_noop(monkeypatch):
+def test_env_root_max_output_unset_is_noop():
     """Missing ROOT_MCP_ROOT_MAX_OUTPUT leaves max_output_size at default."""
-    monkeypatch.delenv("ROOT_MCP_ROOT_MAX_OUTPUT", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.root_native.max_output_size == 10_000_000
@@ -1487,9 +1492,8 @@ def test_env_root_max_code(monkeypatch):
     assert config.root_native.max_code_length == 200000
 
 
-def test_env_root_max_code_unset_is_noop(monkeypatch):
+def test_env_root_max_code_unset_is_noop():
     """Missing ROOT_MCP_ROOT_MAX_CODE leaves max_code_length at default."""
-    monkeypatch.delenv("ROOT_MCP_ROOT_MAX_CODE", raising=False)
     config = _default_config()
     apply_env_overrides(config)
     assert config.root_native.max_code_length == 100_000
@@ -1510,8 +1514,9 @@ def test_cli_root_timeout():
 def test_cli_root_timeout_zero_raises():
     """--root-timeout 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--root-timeout"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(root_timeout=0))
+    assert "--root-timeout" in str(excinfo.value)
 
 
 def test_cli_root_timeout_none_is_noop():
@@ -1545,8 +1550,9 @@ def test_cli_root_max_output():
 def test_cli_root_max_output_zero_raises():
     """--root-max-output 0 raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="--root-max-output"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(root_max_output=0))
+    assert "--root-max-output" in str(excinfo.value)
 
 
 def test_cli_root_max_output_none_is_noop():
@@ -1570,6 +1576,15 @@ def test_cli_root_max_code_none_is_noop():
     assert config.root_native.max_code_length == 100_000
 
 
+def test_cli_invalid_limit_leaves_other_limits_untouched():
+    """A rejected numeric flag does not partially apply the valid ones."""
+    config = _default_config()
+    with pytest.raises(ValueError) as excinfo:
+        apply_cli_overrides(config, _make_args(max_rows=5, root_timeout=0))
+    assert "--root-timeout" in str(excinfo.value)
+    assert config.core.limits.max_rows_per_call == 1_000_000
+
+
 # ---------------------------------------------------------------------------
 # Priority: CLI beats env var
 # ---------------------------------------------------------------------------
@@ -1640,26 +1655,37 @@ def test_parse_resource_spec_xrootd_with_description():
 
 def test_parse_resource_spec_missing_equals_raises():
     """Spec without '=' raises ValueError."""
-    with pytest.raises(ValueError, match="NAME=URI"):
+    with pytest.raises(ValueError) as excinfo:
         _parse_resource_spec("no-equals-here")
+    assert "NAME=URI" in str(excinfo.value)
 
 
 def test_parse_resource_spec_empty_name_raises():
     """Empty name raises ValueError."""
-    with pytest.raises(ValueError, match="empty"):
+    with pytest.raises(ValueError) as excinfo:
         _parse_resource_spec("=file:///data")
+    assert "empty" in str(excinfo.value)
 
 
 def test_parse_resource_spec_empty_uri_raises():
     """Empty URI raises ValueError."""
-    with pytest.raises(ValueError, match="empty"):
+    with pytest.raises(ValueError) as excinfo:
         _parse_resource_spec("myname=")
+    assert "empty" in str(excinfo.value)
 
 
 def test_parse_resource_spec_invalid_name_raises():
-    """Invalid name (spaces) is rejected by ResourceConfig validator."""
-    with pytest.raises(Exception):
+    """Invalid name (spaces) is rejected with the ResourceConfig naming rule."""
+    with pytest.raises(ValueError) as excinfo:
         _parse_resource_spec("bad name=file:///data")
+    assert "alphanumeric" in str(excinfo.value)
+
+
+def test_parse_resource_spec_invalid_name_checked_before_uri():
+    """A bad name is reported even when the URI part is also missing."""
+    with pytest.raises(ValueError) as excinfo:
+        _parse_resource_spec("bad name=")
+    assert "alphanumeric" in str(excinfo.value)
 
 
 # ---------------------------------------------------------------------------
@@ -1707,9 +1733,17 @@ def test_env_resources_empty_segment_skipped(monkeypatch):
     assert "r2" in names
 
 
-def test_env_resources_unset_is_noop(monkeypatch):
+def test_env_resources_whitespace_around_separators(monkeypatch):
+    """Whitespace around semicolons and whitespace-only segments are ignored."""
+    monkeypatch.setenv("ROOT_MCP_RESOURCES", " r1=file:///a ; ;\tr2=file:///b ")
+    config = _default_config()
+    apply_env_overrides(config)
+    added = {r.name: r.uri for r in config.resources if r.name in ("r1", "r2")}
+    assert added == {"r1": "file:///a", "r2": "file:///b"}
+
+
+def test_env_resources_unset_is_noop():
     """Missing ROOT_MCP_RESOURCES leaves resources unchanged."""
-    monkeypatch.delenv("ROOT_MCP_RESOURCES", raising=False)
     config = _default_config()
     before = list(config.resources)
     apply_env_overrides(config)
@@ -1720,8 +1754,9 @@ def test_env_resources_invalid_spec_raises(monkeypatch):
     """A malformed spec in ROOT_MCP_RESOURCES raises ValueError."""
     monkeypatch.setenv("ROOT_MCP_RESOURCES", "no-equals")
     config = _default_config()
-    with pytest.raises(ValueError, match="NAME=URI"):
+    with pytest.raises(ValueError) as excinfo:
         apply_env_overrides(config)
+    assert "NAME=URI" in str(excinfo.value)
 
 
 # ---------------------------------------------------------------------------
@@ -1765,8 +1800,9 @@ def test_cli_resource_multiple():
 def test_cli_resource_invalid_format_raises():
     """A malformed --resource spec raises ValueError."""
     config = _default_config()
-    with pytest.raises(ValueError, match="NAME=URI"):
+    with pytest.raises(ValueError) as excinfo:
         apply_cli_overrides(config, _make_args(resource=["no-equals-sign"]))
+    assert "NAME=URI" in str(excinfo.value)
 
 
 def test_cli_resource_none_is_noop():
@@ -1821,17 +1857,63 @@ def test_cli_resource_overrides_env(monkeypatch):
     assert "r_cli" in names
 
 
+# ===========================================================================
+# Validation order: the first invalid input (in declaration order) is reported
+# ===========================================================================
+
+
+@pytest.mark.parametrize(
+    "env, reported",
+    [
+        ({"ROOT_MCP_MODE": "turbo", "ROOT_MCP_MAX_PATH_DEPTH": "0"}, "ROOT_MCP_MODE"),
+        ({"ROOT_MCP_CACHE_SIZE": "0", "ROOT_MCP_MAX_PATH_DEPTH": "0"}, "ROOT_MCP_MAX_PATH_DEPTH"),
+        ({"ROOT_MCP_PLOT_DPI": "0", "ROOT_MCP_PLOT_FORMAT": "gif"}, "ROOT_MCP_PLOT_DPI"),
+        ({"ROOT_MCP_PLOT_FORMAT": "gif", "ROOT_MCP_PLOT_WIDTH": "0"}, "ROOT_MCP_PLOT_FORMAT"),
+        (
+            {"ROOT_MCP_ROOT_MAX_CODE": "0", "ROOT_MCP_RESOURCES": "no-equals"},
+            "ROOT_MCP_ROOT_MAX_CODE",
+        ),
+    ],
+)
+def test_env_reports_first_invalid_variable(monkeypatch, env, reported):
+    """With several invalid env vars, the error names the first in declaration order."""
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError) as excinfo:
+        apply_env_overrides(_default_config())
+    assert str(excinfo.value).startswith(reported)
+
+
+@pytest.mark.parametrize(
+    "flags, reported",
+    [
+        ({"mode": "turbo", "max_path_depth": 0}, "--mode"),
+        ({"cache_size": 0, "max_path_depth": 0}, "--max-path-depth"),
+        ({"plot_dpi": 0, "plot_format": "gif"}, "--plot-dpi"),
+        ({"plot_format": "gif", "plot_width": 0.0}, "--plot-format"),
+    ],
+)
+def test_cli_reports_first_invalid_flag(flags, reported):
+    """With several invalid flags, the error names the first in declaration order."""
+    with pytest.raises(ValueError) as excinfo:
+        apply_cli_overrides(_default_config(), _make_args(**flags))
+    assert str(excinfo.value).startswith(reported)
+
+
 # ===========================================================================
 # Log Level
 # ===========================================================================
 
 
+#: Root logger level when this module was imported; tests reset to it.
+_BASELINE_LOG_LEVEL = _logging.root.level
+
+
 @pytest.fixture()
 def restore_log_level():
-    """Restore the root logger level after each test so tests don't bleed."""
-    original = _logging.root.level
+    """Reset the root logger level after each test so tests don't bleed."""
     yield
-    _logging.root.setLevel(original)
+    _logging.root.setLevel(_BASELINE_LOG_LEVEL)
 
 
 def test_apply_log_level_debug(restore_log_level):
@@ -1870,13 +1952,14 @@ def test_apply_log_level_mixed_case(restore_log_level):
     assert _logging.root.level == _logging.DEBUG
 
 
-def test_apply_log_level_invalid_raises(restore_log_level):
+def test_apply_log_level_invalid_raises():
     """An unrecognised level string raises ValueError."""
-    with pytest.raises(ValueError, match="Log level must be one of"):
+    with pytest.raises(ValueError) as excinfo:
         apply_log_level("VERBOSE")
+    assert "Log level must be one of" in str(excinfo.value)
 
 
-def test_apply_log_level_empty_raises(restore_log_level):
+def test_apply_log_level_empty_raises():
     """An empty string raises ValueError."""
     with pytest.raises(ValueError):
         apply_log_level("")
@@ -10,6 +10,7 @@ import sys
 from pathlib import Path
 
 import pytest
+from mcp import types
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -102,6 +103,27 @@ class TestMCPToolListing:
         assert mcp_server.kinematics_ops is not None
         assert mcp_server.analysis_tools is not None
 
+    @pytest.mark.asyncio
+    async def test_list_tools_handler_tracks_mode(self, mcp_server):
+        """The registered list_tools handler follows mode switches."""
+        handler = mcp_server.server.request_handlers[types.ListToolsRequest]
+
+        async def tool_names():
+            result = await handler(types.ListToolsRequest(method="tools/list"))
+            return [tool.name for tool in result.root.tools]
+
+        extended = await tool_names()
+        assert "compute_histogram" in extended
+        assert await tool_names() == extended
+
+        mcp_server.switch_mode("core")
+        core = await tool_names()
+        assert "compute_histogram" not in core
+        assert set(core) < set(extended)
+
+        mcp_server.switch_mode("extended")
+        assert await tool_names() == extended
+
     @pytest.mark.asyncio
     async def test_core_tools_available(self, mcp_server):
         """Test that core tools are properly initialized."""
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 
@@ -12,6 +13,9 @@ from root_mcp.common.root_availability import (
     get_root_features,
     reset_cache,
     _probe_root_subprocess,
+    get_root_probe,
+    RootProbe,
+    _build_root_env,
 )
 from root_mcp.config import Config, FeatureFlags
 
@@ -40,7 +44,7 @@ class TestProbeRootSubprocess:
         import subprocess
 
         with patch(
-            "root_mcp.common.root_availability.subprocess.run",
+            "root_mcp.common.root_availability._run",
             side_effect=subprocess.TimeoutExpired(cmd="test", timeout=30),
         ):
             result = _probe_root_subprocess()
@@ -50,7 +54,7 @@ class TestProbeRootSubprocess:
     def test_probe_handles_subprocess_error(self):
         """Probe should handle general subprocess errors gracefully."""
         with patch(
-            "root_mcp.common.root_availability.subprocess.run",
+            "root_mcp.common.root_availability._run",
             side_effect=OSError("No such file"),
         ):
             result = _probe_root_subprocess()
@@ -58,13 +62,10 @@ class TestProbeRootSubprocess:
 
     def test_probe_handles_bad_returncode(self):
         """Probe should handle non-zero return code."""
-        mock_proc = MagicMock()
-        mock_proc.returncode = 1
-        mock_proc.stdout = ""
-        mock_proc.stderr = "error"
+        mock_proc = SimpleNamespace(returncode=1, stdout="", stderr="error")
 
         with patch(
-            "root_mcp.common.root_availability.subprocess.run",
+            "root_mcp.common.root_availability._run",
             return_value=mock_proc,
         ):
             result = _probe_root_subprocess()
@@ -72,13 +73,10 @@ class TestProbeRootSubprocess:
 
     def test_probe_handles_invalid_json(self):
         """Probe should handle invalid JSON output gracefully."""
-        mock_proc = MagicMock()
-        mock_proc.returncode = 0
-        mock_proc.stdout = "not json"
-        mock_proc.stderr = ""
+        mock_proc = SimpleNamespace(returncode=0, stdout="not json", stderr="")
 
         with patch(
-            "root_mcp.common.root_availability.subprocess.run",
+            "root_mcp.common.root_availability._run",
             return_value=mock_proc,
         ):
             result = _probe_root_subprocess()
@@ -182,6 +180,36 @@ class TestGetRootFeatures:
             assert result == features
 
 
+class TestGetRootProbe:
+    """Tests for get_root_probe()."""
+
+    def test_returns_all_fields_from_one_probe(self):
+        """All accessors are served from a single probe result."""
+        mock_result = {
+            "available": True,
+            "version": "6.32/02",
+            "features": {"rdataframe": True},
+        }
+        with patch(
+            "root_mcp.common.root_availability._probe_root_subprocess",
+            return_value=mock_result,
+        ) as mock_probe:
+            probe = get_root_probe()
+            assert probe == RootProbe(True, "6.32/02", {"rdataframe": True})
+            assert is_root_available() is True
+            assert get_root_version() == "6.32/02"
+            assert get_root_features() == {"rdataframe": True}
+            mock_probe.assert_called_once()
+
+    def test_missing_keys_use_defaults(self):
+        """A probe dict without version/features yields None and {}."""
+        with patch(
+            "root_mcp.common.root_availability._probe_root_subprocess",
+            return_value={"available": False},
+        ):
+            assert get_root_probe() == RootProbe()
+
+
 class TestResetCache:
     """Tests for reset_cache()."""
 
@@ -205,6 +233,23 @@ class TestResetCache:
             assert is_root_available() is True
 
 
+class TestBuildRootEnv:
+    """Tests for the environment handed to ROOT subprocesses."""
+
+    def test_root_config_lookups_are_cached(self, monkeypatch):
+        """Repeated env builds (one per execution) run root-config only once per query."""
+        monkeypatch.delenv("CPPYY_API_PATH", raising=False)
+        with (
+            patch("importlib.util.find_spec", return_value=None),
+            patch(
+                "root_mcp.common.root_availability._run", side_effect=FileNotFoundError
+            ) as mock_run,
+        ):
+            _build_root_env()
+            _build_root_env()
+        assert mock_run.call_count == 2  # --libdir and --incdir, once each
+
+
 class TestFeatureFlagIntegration:
     """Tests for the enable_root feature flag in Config."""
 
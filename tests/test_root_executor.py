@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import json
 import os
-import tempfile
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -11,7 +14,8 @@ from root_mcp.extended.root_native.sandbox import (
     CodeValidator,
     ValidationResult,
 )
-from root_mcp.extended.root_native.executor import RootCodeExecutor, ExecutionResult
+from root_mcp.extended.root_native.executor import RootCodeExecutor, ExecutionResult, _drain
+from root_mcp.common.root_availability import reset_cache
 from root_mcp.config import Config, RootNativeConfig
 
 # ---------------------------------------------------------------------------
@@ -33,6 +37,12 @@ class TestValidationResult:
         result.add_error("bad thing")
         assert result.is_valid is False
         assert "bad thing" in result.errors
+        assert result.error_codes == set()
+
+    def test_add_error_records_code(self):
+        result = ValidationResult(is_valid=True)
+        result.add_error("bad thing", "blocked_module:os")
+        assert result.error_codes == {"blocked_module:os"}
 
     def test_add_warning_keeps_valid(self):
         result = ValidationResult(is_valid=True)
@@ -41,164 +51,195 @@ class TestValidationResult:
         assert "heads up" in result.warnings
 
 
+@pytest.fixture(scope="module")
+def validator():
+    """Shared default CodeValidator; ``validate()`` keeps no state between calls."""
+    return CodeValidator()
+
+
 class TestCodeValidatorImports:
     """Tests for import validation."""
 
-    def setup_method(self):
-        self.validator = CodeValidator()
-
-    def test_allows_root_import(self):
-        result = self.validator.validate("import ROOT")
+    def test_allows_root_import(self, validator):
+        result = validator.validate("import ROOT")
         assert result.is_valid is True
 
-    def test_allows_numpy_import(self):
-        result = self.validator.validate("import numpy as np")
+    def test_allows_numpy_import(self, validator):
+        result = validator.validate("import numpy as np")
         assert result.is_valid is True
 
-    def test_allows_matplotlib_import(self):
-        result = self.validator.validate("from matplotlib import pyplot as plt")
+    def test_allows_matplotlib_import(self, validator):
+        result = validator.validate("from matplotlib import pyplot as plt")
         assert result.is_valid is True
 
-    def test_blocks_os_import(self):
-        result = self.validator.validate("import os")
+    def test_blocks_os_import(self, validator):
+        result = validator.validate("import os")
         assert result.is_valid is False
-        assert any("os" in e for e in result.errors)
+        assert "blocked_module:os" in result.error_codes
 
-    def test_blocks_subprocess_import(self):
-        result = self.validator.validate("import subprocess")
+    def test_blocks_subprocess_import(self, validator):
+        result = validator.validate("import subprocess")
         assert result.is_valid is False
 
-    def test_blocks_shutil_import(self):
-        result = self.validator.validate("import shutil")
+    def test_blocks_shutil_import(self, validator):
+        result = validator.validate("import shutil")
         assert result.is_valid is False
 
-    def test_blocks_socket_import(self):
-        result = self.validator.validate("import socket")
+    def test_blocks_socket_import(self, validator):
+        result = validator.validate("import socket")
         assert result.is_valid is False
 
-    def test_blocks_from_os_import(self):
-        result = self.validator.validate("from os import path")
+    def test_blocks_from_os_import(self, validator):
+        result = validator.validate("from os import path")
         assert result.is_valid is False
 
-    def test_blocks_from_subprocess_import(self):
-        result = self.validator.validate("from subprocess import run")
+    def test_blocks_from_subprocess_import(self, validator):
+        result = validator.validate("from subprocess import run")
         assert result.is_valid is False
 
-    def test_blocks_requests_import(self):
-        result = self.validator.validate("import requests")
+    def test_blocks_requests_import(self, validator):
+        result = validator.validate("import requests")
         assert result.is_valid is False
 
-    def test_blocks_ctypes_import(self):
-        result = self.validator.validate("import ctypes")
+    def test_blocks_ctypes_import(self, validator):
+        result = validator.validate("import ctypes")
         assert result.is_valid is False
 
-    def test_warns_unknown_module(self):
-        result = self.validator.validate("import some_unknown_module")
+    def test_warns_unknown_module(self, validator):
+        result = validator.validate("import some_unknown_module")
         assert result.is_valid is True  # warnings don't block
         assert len(result.warnings) > 0
 
-    def test_allows_scipy_submodule(self):
-        result = self.validator.validate("from scipy.optimize import curve_fit")
+    def test_allows_scipy_submodule(self, validator):
+        result = validator.validate("from scipy.optimize import curve_fit")
         assert result.is_valid is True
 
-    def test_blocks_http_import(self):
-        result = self.validator.validate("import http.server")
+    def test_blocks_http_import(self, validator):
+        result = validator.validate("import http.server")
         assert result.is_valid is False
 
+    def test_blocks_deep_dotted_import(self, validator):
+        result = validator.validate("from urllib.request.foo import bar")
+        assert result.is_valid is False
+        assert result.error_codes == {"blocked_module:urllib"}
+
+    def test_blocked_name_is_not_a_string_prefix(self, validator):
+        # "code" is blocked; "codecs" merely shares its spelling
+        result = validator.validate("import codecs")
+        assert result.is_valid is True
+
 
 class TestCodeValidatorAttributes:
     """Tests for blocked attribute access."""
 
-    def setup_method(self):
-        self.validator = CodeValidator()
-
-    def test_blocks_system_attr(self):
-        result = self.validator.validate("x.system('ls')")
+    def test_blocks_system_attr(self, validator):
+        result = validator.validate("x.system('ls')")
         assert result.is_valid is False
 
-    def test_blocks_popen_attr(self):
-        result = self.validator.validate("x.popen('cmd')")
+    def test_blocks_popen_attr(self, validator):
+        result = validator.validate("x.popen('cmd')")
         assert result.is_valid is False
 
-    def test_blocks_remove_attr(self):
-        result = self.validator.validate("x.remove('file')")
+    def test_blocks_remove_attr(self, validator):
+        result = validator.validate("x.remove('file')")
         assert result.is_valid is False
 
-    def test_blocks_rmtree_attr(self):
-        result = self.validator.validate("x.rmtree('/path')")
+    def test_blocks_rmtree_attr(self, validator):
+        result = validator.validate("x.rmtree('/path')")
         assert result.is_valid is False
 
-    def test_blocks_kill_attr(self):
-        result = self.validator.validate("x.kill()")
+    def test_blocks_kill_attr(self, validator):
+        result = validator.validate("x.kill()")
         assert result.is_valid is False
 
-    def test_allows_normal_attrs(self):
-        result = self.validator.validate("h.GetMean()")
+    def test_allows_normal_attrs(self, validator):
+        result = validator.validate("h.GetMean()")
         assert result.is_valid is True
 
 
 class TestCodeValidatorBuiltins:
     """Tests for blocked built-in calls."""
 
-    def setup_method(self):
-        self.validator = CodeValidator()
-
-    def test_blocks_exec(self):
-        result = self.validator.validate("exec('print(1)')")
+    def test_blocks_exec(self, validator):
+        result = validator.validate("exec('print(1)')")
         assert result.is_valid is False
 
-    def test_blocks_eval(self):
-        result = self.validator.validate("eval('1+1')")
+    def test_blocks_eval(self, validator):
+        result = validator.validate("eval('1+1')")
         assert result.is_valid is False
 
-    def test_blocks_compile(self):
-        result = self.validator.validate("compile('x', 'f', 'exec')")
+    def test_blocks_compile(self, validator):
+        result = validator.validate("compile('x', 'f', 'exec')")
         assert result.is_valid is False
 
-    def test_blocks___import__(self):
-        result = self.validator.validate("__import__('os')")
+    def test_blocks___import__(self, validator):
+        result = validator.validate("__import__('os')")
         assert result.is_valid is False
 
-    def test_allows_print(self):
-        result = self.validator.validate("print('hello')")
+    def test_allows_print(self, validator):
+        result = validator.validate("print('hello')")
         assert result.is_valid is True
 
-    def test_allows_len(self):
-        result = self.validator.validate("len([1, 2, 3])")
+    def test_allows_len(self, validator):
+        result = validator.validate("len([1, 2, 3])")
         assert result.is_valid is True
 
 
 class TestCodeValidatorEdgeCases:
     """Tests for edge cases in validation."""
 
-    def setup_method(self):
-        self.validator = CodeValidator()
-
-    def test_empty_code(self):
-        result = self.validator.validate("")
+    def test_empty_code(self, validator):
+        result = validator.validate("")
         assert result.is_valid is False
 
-    def test_whitespace_only(self):
-        result = self.validator.validate("   \n\n  ")
+    def test_whitespace_only(self, validator):
+        result = validator.validate("   \n\n  ")
         assert result.is_valid is False
 
-    def test_syntax_error(self):
-        result = self.validator.validate("def foo(:")
+    def test_syntax_error(self, validator):
+        result = validator.validate("def foo(:")
         assert result.is_valid is False
-        assert any("Syntax error" in e for e in result.errors)
+        assert "syntax" in result.error_codes
+
+    def test_repeated_validation_is_consistent(self, validator):
+        """Re-validating a snippet (served from the parse cache) gives the same result."""
+        for _ in range(2):
+            result = validator.validate("import os")
+            assert result.is_valid is False
+            assert len(result.errors) == 1
+        for _ in range(2):
+            result = validator.validate("def foo(:")
+            assert "syntax" in result.error_codes
+
+    def test_subclass_check_overrides_are_used(self):
+        class NoImportChecks(CodeValidator):
+            def _check_imports(self, node, result):
+                pass
+
+        assert NoImportChecks().validate("import os").is_valid is True
+
+    def test_policy_attributes_are_read_at_validation(self):
+        validator = CodeValidator()
+        assert validator.validate("import numpy").is_valid is True
+        validator.blocked_modules = validator.blocked_modules | {"numpy"}
+        assert validator.validate("import numpy").error_codes == {"blocked_module:numpy"}
+
+        assert validator.validate("x = 1").is_valid is True
+        validator.max_code_length = 3
+        assert validator.validate("x = 1").error_codes == {"too_long"}
 
     def test_code_too_long(self):
         validator = CodeValidator(max_code_length=100)
         result = validator.validate("x = 1\n" * 100)
         assert result.is_valid is False
-        assert any("maximum length" in e for e in result.errors)
+        assert "too_long" in result.error_codes
 
-    def test_open_warning(self):
-        result = self.validator.validate("f = open('output.txt', 'w')")
+    def test_open_warning(self, validator):
+        result = validator.validate("f = open('output.txt', 'w')")
         assert result.is_valid is True
         assert len(result.warnings) > 0
 
-    def test_multiline_valid_code(self):
+    def test_multiline_valid_code(self, validator):
         code = """
 import ROOT
 import numpy as np
@@ -207,18 +248,23 @@ h = ROOT.TH1F("h", "test", 100, -5, 5)
 h.FillRandom("gaus", 10000)
 print(h.GetMean(), h.GetRMS())
 """
-        result = self.validator.validate(code)
+        result = validator.validate(code)
         assert result.is_valid is True
 
-    def test_multiple_blocked_items(self):
+    def test_multiple_blocked_items(self, validator):
         code = """
 import os
 import subprocess
 exec('bad')
 """
-        result = self.validator.validate(code)
+        result = validator.validate(code)
         assert result.is_valid is False
         assert len(result.errors) >= 3
+        assert {
+            "blocked_module:os",
+            "blocked_module:subprocess",
+            "blocked_builtin:exec",
+        } <= result.error_codes
 
 
 # ---------------------------------------------------------------------------
@@ -226,11 +272,28 @@ exec('bad')
 # ---------------------------------------------------------------------------
 
 
+# Plumbing tests patch the interpreter launch; only tests whose subject is the
+# subprocess's own behaviour pay for a real one.
+_RUN_CAPPED = "root_mcp.extended.root_native.executor._run_capped"
+_BUILD_ROOT_ENV = "root_mcp.common.root_availability._build_root_env"
+_FAKE_PROC = SimpleNamespace(returncode=0, stdout="", stderr="")
+
+
+def _is_running(pid: int) -> bool:
+    """Whether *pid* exists and is not a zombie (Linux /proc)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
 class TestRootCodeExecutor:
     """Tests for the subprocess-based code executor."""
 
-    def setup_method(self):
-        self.work_dir = tempfile.mkdtemp(prefix="test_root_exec_")
+    @pytest.fixture(autouse=True)
+    def _setup(self, tmp_path):
+        self.work_dir = str(tmp_path)
         self.executor = RootCodeExecutor(
             execution_timeout=10,
             working_directory=self.work_dir,
@@ -257,18 +320,28 @@ print(f"result={result}")
     def test_execute_validation_failure(self):
         """Code that fails validation should not execute."""
         code = "import os\nos.system('rm -rf /')"
-        result = self.executor.execute(code)
+        with patch(_RUN_CAPPED) as mock_run:
+            result = self.executor.execute(code)
+        mock_run.assert_not_called()
         assert result.status == "validation_failed"
         assert result.error is not None
         assert "validation failed" in result.error.lower()
 
     def test_execute_skip_validation(self):
         """skip_validation=True should bypass the validator."""
-        # This code would fail validation but should run with skip
-        code = "print('ran successfully')"
-        result = self.executor.execute(code, skip_validation=True)
+        # This code would fail validation but should reach the subprocess with skip
+        code = "import os\nprint('ran successfully')"
+
+        def run_ok(args, *, cwd, **kwargs):
+            with open(os.path.join(cwd, "_result.json"), "w") as f:
+                json.dump({"status": "success"}, f)
+            return _FAKE_PROC
+
+        with patch(_RUN_CAPPED, side_effect=run_ok) as mock_run:
+            result = self.executor.execute(code, skip_validation=True)
+        mock_run.assert_called_once()
         assert result.status == "success"
-        assert "ran successfully" in result.stdout
+        assert result.validation is None
 
     def test_execute_runtime_error(self):
         """Code with a runtime error should report error status."""
@@ -291,6 +364,42 @@ time.sleep(30)
         result = executor.execute(code)
         assert result.status == "timeout"
         assert result.error is not None
+        assert os.listdir(self.work_dir) == []  # no leaked exec_* dir
+
+    @pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+    def test_execute_timeout_kills_spawned_processes(self, tmp_path_factory):
+        """A timeout also kills processes the user code started."""
+        pid_file = tmp_path_factory.mktemp("pids") / "child.pid"
+        executor = RootCodeExecutor(execution_timeout=1, working_directory=self.work_dir)
+        code = f"""
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+open({str(pid_file)!r}, "w").write(str(child.pid))
+time.sleep(30)
+"""
+        result = executor.execute(code, skip_validation=True)
+        assert result.status == "timeout"
+        pid = int(pid_file.read_text())
+        for _ in range(50):
+            if not _is_running(pid):
+                break
+            time.sleep(0.1)
+        assert not _is_running(pid)
+
+    def test_drain_keeps_output_read_before_a_failure(self):
+        stream = MagicMock()
+        stream.read1.side_effect = [b"partial", OSError("pipe broke")]
+        out: list[tuple[bytes, int]] = []
+        with pytest.raises(OSError):
+            _drain(stream, 4, out)
+        assert out == [(b"part", 7)]
+
+    def test_execute_launch_failure_cleans_work_dir(self):
+        """A subprocess that cannot be started leaves no working dir behind."""
+        with patch(_RUN_CAPPED, side_effect=OSError("no interpreter")):
+            result = self.executor.execute("print('never runs')")
+        assert result.status == "error"
+        assert os.listdir(self.work_dir) == []
 
     def test_execute_output_files(self):
         """Code that writes files should report them."""
@@ -305,6 +414,30 @@ with open(output_path, "w") as f:
         assert len(result.output_files) > 0
         assert any("test_output.json" in f for f in result.output_files)
 
+    def test_execute_shared_output_dir_reports_only_new_files(self):
+        """Files left in a reused output_dir by earlier runs are not reported again."""
+        output_dir = os.path.join(self.work_dir, "shared_out")
+        write = "open(_output_dir + '/{name}', 'w').write('{name}')"
+        first = self.executor.execute(write.format(name="a.json"), output_dir=output_dir)
+        assert [os.path.basename(f) for f in first.output_files] == ["a.json"]
+        second = self.executor.execute(write.format(name="b.json"), output_dir=output_dir)
+        assert [os.path.basename(f) for f in second.output_files] == ["b.json"]
+
+    def test_execute_reports_rewrite_that_keeps_mtime(self):
+        """A file rewritten within the same mtime tick is still reported."""
+        output_dir = os.path.join(self.work_dir, "shared_out")
+        self.executor.execute("open(_output_dir + '/a.txt', 'w').write('a')", output_dir=output_dir)
+        code = """
+import os
+path = _output_dir + "/a.txt"
+before = os.stat(path).st_mtime_ns
+with open(path, "w") as f:
+    f.write("longer")
+os.utime(path, ns=(before, before))
+"""
+        result = self.executor.execute(code, output_dir=output_dir, skip_validation=True)
+        assert [os.path.basename(f) for f in result.output_files] == ["a.txt"]
+
     def test_execute_captures_stderr(self):
         """Stderr output should be captured."""
         code = """
@@ -315,6 +448,18 @@ print("error message", file=sys.stderr)
         assert result.status == "success"
         assert "error message" in result.stderr
 
+    def test_execute_truncates_large_output(self):
+        """Output beyond max_output_size is dropped while streaming and flagged."""
+        executor = RootCodeExecutor(
+            execution_timeout=10,
+            max_output_size=100,
+            working_directory=self.work_dir,
+        )
+        result = executor.execute("import sys\nsys.stdout.write('x' * 200_000)")
+        assert result.status == "success"
+        assert result.stdout.startswith("x" * 100)
+        assert result.stdout.endswith("[truncated, 200000 total bytes]")
+
     def test_execute_with_timeout_override(self):
         """Timeout parameter should override default."""
         code = "print('fast')"
@@ -325,9 +470,34 @@ print("error message", file=sys.stderr)
         """Executor should create working directory if it doesn't exist."""
         new_dir = os.path.join(self.work_dir, "new_subdir")
         executor = RootCodeExecutor(working_directory=new_dir)
-        result = executor.execute("print('ok')")
-        assert result.status == "success"
+        with patch(_RUN_CAPPED, return_value=_FAKE_PROC) as mock_run:
+            executor.execute("print('ok')")
         assert os.path.isdir(new_dir)
+        assert mock_run.call_args.kwargs["cwd"].startswith(new_dir)
+
+    def test_execute_reuses_subprocess_env(self):
+        """The subprocess environment is built once, and each call gets a copy."""
+        with (
+            patch(_BUILD_ROOT_ENV, return_value={"PATH": "/bin"}) as mock_build,
+            patch(_RUN_CAPPED, return_value=_FAKE_PROC) as mock_run,
+        ):
+            self.executor.execute("print(1)")
+            self.executor.execute("print(2)")
+        mock_build.assert_called_once()
+        first, second = (call.kwargs["env"] for call in mock_run.call_args_list)
+        assert first == second == {"PATH": "/bin", "ROOT_BATCH": "1"}
+        assert first is not second
+
+    def test_execute_rebuilds_env_after_reset_cache(self):
+        with (
+            patch(_BUILD_ROOT_ENV, side_effect=[{"A": "1"}, {"A": "2"}]) as mock_build,
+            patch(_RUN_CAPPED, return_value=_FAKE_PROC) as mock_run,
+        ):
+            self.executor.execute("print(1)")
+            reset_cache()
+            self.executor.execute("print(2)")
+        assert mock_build.call_count == 2
+        assert mock_run.call_args.kwargs["env"]["A"] == "2"
 
     def test_execution_result_dataclass(self):
         """ExecutionResult should have all expected fields."""
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
-import tempfile
+import subprocess
+import sys
 from unittest.mock import patch
 
+import pytest
 
 from root_mcp.config import Config, FeatureFlags, RootNativeConfig
 from root_mcp.extended.tools.root_native import RootNativeTools
+from root_mcp.server import ROOTMCPServer
 
 # ---------------------------------------------------------------------------
 # RootNativeTools unit tests
@@ -47,19 +50,25 @@ class TestRootNativeToolsInit:
         assert tools.executor.max_output_size == 5_000_000
         assert tools.executor.allowed_output_formats == ["png", "pdf"]
 
+    def test_import_does_not_load_analysis_stack(self):
+        # Run in a fresh interpreter: this process has already imported scipy
+        code = (
+            "import sys, root_mcp.extended.tools.root_native\n"
+            "print(sorted({'scipy', 'matplotlib'} & sys.modules.keys()))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=False
+        )
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.strip() == "[]"
+
 
 class TestRootNativeToolsExecution:
     """Tests for run_root_code method."""
 
-    def setup_method(self):
-        self.work_dir = tempfile.mkdtemp(prefix="test_rnt_")
-        self.config = Config(
-            root_native=RootNativeConfig(
-                execution_timeout=10,
-                working_directory=self.work_dir,
-            )
-        )
-        self.tools = RootNativeTools(config=self.config)
+    @pytest.fixture(autouse=True)
+    def _setup(self, native_tools):
+        self.tools = native_tools
 
     def test_run_simple_code(self):
         result = self.tools.run_root_code(code="print('hello from tool')")
@@ -80,6 +89,14 @@ print(f"pi={math.pi:.4f}")
         result = self.tools.run_root_code(code="import os\nos.system('ls')")
         assert result["status"] == "validation_failed"
         assert "error" in result
+        assert result["error_codes"] == ["blocked_attribute:system", "blocked_module:os"]
+        assert "sandbox" in result["hint"]
+
+    def test_run_code_with_syntax_error(self):
+        result = self.tools.run_root_code(code="def f(:")
+        assert result["status"] == "validation_failed"
+        assert result["error_codes"] == ["syntax"]
+        assert "syntax error" in result["hint"]
 
     def test_run_code_with_runtime_error(self):
         result = self.tools.run_root_code(code="1/0")
@@ -138,56 +155,51 @@ print("stderr msg", file=sys.stderr)
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(scope="module")
+def server_factory():
+    """Build ROOTMCPServer instances once per ``(enable_root, root_available)`` pair.
+
+    Construction registers every tool handler and takes tens of milliseconds,
+    so tests that only inspect a server share one.  Tests that mutate the
+    server (e.g. switching modes) must build their own.
+    """
+    cache = {}
+
+    def make(enable_root: bool, root_available: bool):
+        key = (enable_root, root_available)
+        if key not in cache:
+            with (
+                patch("root_mcp.server.is_root_available", return_value=root_available),
+                patch("root_mcp.server.get_root_version", return_value="6.32/02"),
+            ):
+                cache[key] = ROOTMCPServer(Config(features=FeatureFlags(enable_root=enable_root)))
+        return cache[key]
+
+    return make
+
+
 class TestToolVisibility:
     """Tests that run_root_code tool is shown/hidden correctly."""
 
-    def test_tool_hidden_when_root_disabled(self):
+    def test_tool_hidden_when_root_disabled(self, server_factory):
         """Tool should not appear when enable_root is False."""
-        config = Config(features=FeatureFlags(enable_root=False))
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
+        server = server_factory(enable_root=False, root_available=True)
         assert server._root_native_available is False
 
-    def test_tool_hidden_when_root_not_installed(self):
+    def test_tool_hidden_when_root_not_installed(self, server_factory):
         """Tool should not appear when ROOT is not importable."""
-        config = Config(features=FeatureFlags(enable_root=True))
-
-        with patch(
-            "root_mcp.server.is_root_available",
-            return_value=False,
-        ):
-            from root_mcp.server import ROOTMCPServer
-
-            server = ROOTMCPServer(config)
-            assert server._root_native_available is False
+        server = server_factory(enable_root=True, root_available=False)
+        assert server._root_native_available is False
 
-    def test_tool_visible_when_root_enabled_and_available(self):
+    def test_tool_visible_when_root_enabled_and_available(self, server_factory):
         """Tool should appear when enable_root=True and ROOT is available."""
-        config = Config(features=FeatureFlags(enable_root=True))
-
-        with (
-            patch(
-                "root_mcp.server.is_root_available",
-                return_value=True,
-            ),
-            patch(
-                "root_mcp.server.get_root_version",
-                return_value="6.32/02",
-            ),
-        ):
-            from root_mcp.server import ROOTMCPServer
-
-            server = ROOTMCPServer(config)
-            assert server._root_native_available is True
-            assert hasattr(server, "root_native_tools")
+        server = server_factory(enable_root=True, root_available=True)
+        assert server._root_native_available is True
+        assert hasattr(server, "root_native_tools")
 
-    def test_get_root_native_tools_returns_tool_schema(self):
+    def test_get_root_native_tools_returns_tool_schema(self, server_factory):
         """_get_root_native_tools should return all native ROOT tools."""
-        config = Config()
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
+        server = server_factory(enable_root=False, root_available=False)
         tools = server._get_root_native_tools()
         names = [t.name for t in tools]
         assert "run_root_code" in names
@@ -211,8 +223,6 @@ class TestToolVisibility:
                 return_value="6.32/02",
             ),
         ):
-            from root_mcp.server import ROOTMCPServer
-
             server = ROOTMCPServer(config)
             assert server._root_native_available is True
 
@@ -225,12 +235,9 @@ class TestToolVisibility:
 class TestToolDispatch:
     """Tests for run_root_code dispatch in call_tool."""
 
-    def test_dispatch_when_not_available_returns_error(self):
+    def test_dispatch_when_not_available_returns_error(self, server_factory):
         """Calling run_root_code when ROOT is not available should return error."""
-        config = Config(features=FeatureFlags(enable_root=False))
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
+        server = server_factory(enable_root=False, root_available=False)
         assert server._root_native_available is False
 
         # Simulate calling the tool via the dispatch logic
@@ -248,29 +255,12 @@ class TestToolDispatch:
         # _root_native_available flag instead
         assert server._root_native_available is False
 
-    def test_dispatch_when_available_executes(self):
+    def test_dispatch_when_available_executes(self, server_factory):
         """Calling run_root_code when ROOT is available should execute."""
-        config = Config(
-            features=FeatureFlags(enable_root=True),
-            root_native=RootNativeConfig(execution_timeout=10),
-        )
+        server = server_factory(enable_root=True, root_available=True)
+        assert server._root_native_available is True
 
-        with (
-            patch(
-                "root_mcp.server.is_root_available",
-                return_value=True,
-            ),
-            patch(
-                "root_mcp.server.get_root_version",
-                return_value="6.32/02",
-            ),
-        ):
-            from root_mcp.server import ROOTMCPServer
-
-            server = ROOTMCPServer(config)
-            assert server._root_native_available is True
-
-            # Call the tool directly
-            result = server.root_native_tools.run_root_code(code="print('dispatched')")
-            assert result["status"] == "success"
-            assert "dispatched" in result["stdout"]
+        # Call the tool directly
+        result = server.root_native_tools.run_root_code(code="print('dispatched')", timeout=10)
+        assert result["status"] == "success"
+        assert "dispatched" in result["stdout"]
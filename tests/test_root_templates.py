@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
-import ast
-import tempfile
+import json
+import os
+import subprocess
+from functools import cache
+from unittest.mock import patch
 
+import pytest
 
+from root_mcp.common.root_availability import is_root_available
 from root_mcp.extended.root_native.templates import (
     rdataframe_histogram,
     rdataframe_snapshot,
@@ -14,14 +19,44 @@ from root_mcp.extended.root_native.templates import (
     root_file_write,
     root_macro,
 )
-from root_mcp.extended.tools.root_native import RootNativeTools
-from root_mcp.config import Config, RootNativeConfig
+from root_mcp.config import Config
+from root_mcp.server import ROOTMCPServer
+
+
+@cache
+def _assert_valid_python(code: str) -> None:
+    # compile() also rejects code that parses but cannot be compiled (e.g. a
+    # stray 'return'), and skips building Python-level AST objects. Identical
+    # scripts (the parameter-keyed templates are memoized) compile only once.
+    # Compiling stays inside the tests rather than at import time so that a
+    # broken template fails its own test instead of the module's collection.
+    compile(code, "<tmpl>", "exec")
+
 
 # ---------------------------------------------------------------------------
 # Template generation tests — verify templates produce valid Python
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(scope="module")
+def rdf_hist_samples():
+    """rdataframe_histogram scripts for the content checks, generated once."""
+    base = {
+        "file_path": "/data/test.root",
+        "tree_name": "Events",
+        "branch": "pt",
+        "bins": 50,
+        "range_min": 0.0,
+        "range_max": 100.0,
+    }
+    return {
+        "basic": rdataframe_histogram(**base),
+        "with_selection": rdataframe_histogram(**base, selection="pt > 20"),
+        "with_weight": rdataframe_histogram(**base, weight="weight"),
+        "with_output_path": rdataframe_histogram(**base, output_path="/tmp/hist.png"),
+    }
+
+
 class TestRDataFrameHistogramTemplate:
     """Tests for rdataframe_histogram template."""
 
@@ -34,46 +69,92 @@ class TestRDataFrameHistogramTemplate:
             range_min=0.0,
             range_max=200.0,
         )
-        ast.parse(code)  # Should not raise
-
-    def test_contains_rdataframe(self):
-        code = rdataframe_histogram(
-            file_path="/data/test.root",
-            tree_name="Events",
-            branch="pt",
-            bins=50,
-            range_min=0.0,
-            range_max=100.0,
-        )
+        _assert_valid_python(code)  # Should not raise
+
+    def test_optional_blocks_are_valid_python(self, rdf_hist_samples):
+        for code in rdf_hist_samples.values():
+            _assert_valid_python(code)
+
+    def test_repeated_call_reuses_script(self):
+        kwargs = {
+            "file_path": "/data/test.root",
+            "tree_name": "Events",
+            "branch": "pt",
+            "bins": 100,
+            "range_min": 0.0,
+            "range_max": 200.0,
+        }
+        assert rdataframe_histogram(**kwargs) is rdataframe_histogram(**kwargs)
+        assert rdataframe_histogram(**{**kwargs, "bins": 10}) != rdataframe_histogram(**kwargs)
+
+    def test_float_bins_do_not_poison_int_bins(self):
+        kwargs = {
+            "file_path": "/data/test.root",
+            "tree_name": "Events",
+            "branch": "pt",
+            "range_min": 0.0,
+            "range_max": 100.0,
+        }
+        float_code = rdataframe_histogram(**kwargs, bins=50.0)
+        int_code = rdataframe_histogram(**kwargs, bins=50)
+        assert "range(50.0 + 1)" in float_code
+        assert "range(50 + 1)" in int_code
+        assert "50.0" not in int_code
+
+    def test_contains_rdataframe(self, rdf_hist_samples):
+        code = rdf_hist_samples["basic"]
         assert "ROOT.RDataFrame" in code
         assert "Histo1D" in code
 
-    def test_includes_selection(self):
-        code = rdataframe_histogram(
-            file_path="/data/test.root",
-            tree_name="Events",
-            branch="pt",
-            bins=50,
-            range_min=0.0,
-            range_max=100.0,
-            selection="pt > 20",
-        )
+    def test_includes_selection(self, rdf_hist_samples):
+        code = rdf_hist_samples["with_selection"]
         assert "Filter" in code
         assert "pt > 20" in code
 
-    def test_includes_weight(self):
+    def test_includes_weight(self, rdf_hist_samples):
+        assert "weight" in rdf_hist_samples["with_weight"]
+
+    def test_includes_output_path(self, rdf_hist_samples):
+        code = rdf_hist_samples["with_output_path"]
+        missing = {s for s in ("SaveAs", "/tmp/hist.png", "SetBatch") if s not in code}
+        assert not missing, missing
+
+    def test_enables_implicit_mt_by_default(self, rdf_hist_samples):
+        code = rdf_hist_samples["basic"]
+        assert code.index("ROOT.EnableImplicitMT()") < code.index("ROOT.RDataFrame(")
+
+    @pytest.mark.parametrize(
+        "file_path, prefetch, setup",
+        [
+            (
+                "root://eospublic.cern.ch//eos/opendata/events.root",
+                True,
+                [
+                    "# Remote input: prefetch the next cluster while processing this one",
+                    'ROOT.gEnv.SetValue("TFile.AsyncPrefetching", 1)',
+                ],
+            ),
+            ("root://eospublic.cern.ch//eos/opendata/events.root", False, []),
+            ("/data/test.root", True, []),
+        ],
+    )
+    def test_async_prefetch_is_opt_in_and_remote_only(self, file_path, prefetch, setup):
         code = rdataframe_histogram(
-            file_path="/data/test.root",
+            file_path=file_path,
             tree_name="Events",
             branch="pt",
             bins=50,
             range_min=0.0,
             range_max=100.0,
-            weight="weight",
+            prefetch=prefetch,
         )
-        assert "weight" in code
+        _assert_valid_python(code)
+        lines = code.splitlines()
+        imt = lines.index("ROOT.EnableImplicitMT()")
+        rdf = lines.index(f"rdf = ROOT.RDataFrame('Events', {file_path!r})")
+        assert lines[imt + 1 : rdf] == setup
 
-    def test_includes_output_path(self):
+    def test_single_threaded_opt_out(self):
         code = rdataframe_histogram(
             file_path="/data/test.root",
             tree_name="Events",
@@ -81,35 +162,17 @@ class TestRDataFrameHistogramTemplate:
             bins=50,
             range_min=0.0,
             range_max=100.0,
-            output_path="/tmp/hist.png",
+            multithreaded=False,
         )
-        assert "SaveAs" in code
-        assert "/tmp/hist.png" in code
-        assert "SetBatch" in code
+        assert "EnableImplicitMT" not in code
 
-    def test_no_output_path_no_canvas(self):
-        code = rdataframe_histogram(
-            file_path="/data/test.root",
-            tree_name="Events",
-            branch="pt",
-            bins=50,
-            range_min=0.0,
-            range_max=100.0,
-        )
-        assert "SaveAs" not in code
+    def test_no_output_path_no_canvas(self, rdf_hist_samples):
+        assert "SaveAs" not in rdf_hist_samples["basic"]
 
-    def test_outputs_json(self):
-        code = rdataframe_histogram(
-            file_path="/data/test.root",
-            tree_name="Events",
-            branch="pt",
-            bins=50,
-            range_min=0.0,
-            range_max=100.0,
-        )
-        assert "json.dumps" in code
-        assert "GetMean" in code
-        assert "GetStdDev" in code
+    def test_outputs_json(self, rdf_hist_samples):
+        code = rdf_hist_samples["basic"]
+        missing = {s for s in ("json.dumps", "GetMean", "GetStdDev") if s not in code}
+        assert not missing, missing
 
 
 class TestRDataFrameSnapshotTemplate:
@@ -122,7 +185,17 @@ class TestRDataFrameSnapshotTemplate:
             branches=["pt", "eta", "phi"],
             output_path="/tmp/output.root",
         )
-        ast.parse(code)
+        _assert_valid_python(code)
+
+    def test_implicit_mt_is_opt_in(self):
+        kwargs = {
+            "file_path": "/data/test.root",
+            "tree_name": "Events",
+            "branches": ["pt"],
+            "output_path": "/tmp/output.root",
+        }
+        assert "EnableImplicitMT" not in rdataframe_snapshot(**kwargs)
+        assert "ROOT.EnableImplicitMT()" in rdataframe_snapshot(**kwargs, multithreaded=True)
 
     def test_contains_snapshot(self):
         code = rdataframe_snapshot(
@@ -165,7 +238,7 @@ class TestTCanvasPlotTemplate:
             draw_expr="pt",
             output_path="/tmp/plot.png",
         )
-        ast.parse(code)
+        _assert_valid_python(code)
 
     def test_contains_draw(self):
         code = tcanvas_plot(
@@ -174,9 +247,8 @@ class TestTCanvasPlotTemplate:
             draw_expr="px:py",
             output_path="/tmp/plot.png",
         )
-        assert "Draw" in code
-        assert "TCanvas" in code
-        assert "SaveAs" in code
+        missing = {s for s in ("Draw", "TCanvas", "SaveAs") if s not in code}
+        assert not missing, missing
 
     def test_includes_selection(self):
         code = tcanvas_plot(
@@ -221,7 +293,7 @@ class TestRooFitFitTemplate:
             model_name="model",
             data_name="data",
         )
-        ast.parse(code)
+        _assert_valid_python(code)
 
     def test_contains_roofit_calls(self):
         code = roofit_fit(
@@ -230,9 +302,8 @@ class TestRooFitFitTemplate:
             model_name="model",
             data_name="data",
         )
-        assert "fitTo" in code
-        assert "RooFit" in code
-        assert "floatParsFinal" in code
+        missing = {s for s in ("fitTo", "RooFit", "floatParsFinal") if s not in code}
+        assert not missing, missing
 
     def test_includes_output_path(self):
         code = roofit_fit(
@@ -242,9 +313,8 @@ class TestRooFitFitTemplate:
             data_name="data",
             output_path="/tmp/fit.png",
         )
-        assert "SaveAs" in code
-        assert "/tmp/fit.png" in code
-        assert "plotOn" in code
+        missing = {s for s in ("SaveAs", "/tmp/fit.png", "plotOn") if s not in code}
+        assert not missing, missing
 
     def test_outputs_json(self):
         code = roofit_fit(
@@ -253,9 +323,8 @@ class TestRooFitFitTemplate:
             model_name="model",
             data_name="data",
         )
-        assert "json.dumps" in code
-        assert "min_nll" in code
-        assert "parameters" in code
+        missing = {s for s in ("json.dumps", "min_nll", "parameters") if s not in code}
+        assert not missing, missing
 
 
 class TestRootFileWriteTemplate:
@@ -266,18 +335,33 @@ class TestRootFileWriteTemplate:
             data={"x": [1.0, 2.0, 3.0], "y": [4.0, 5.0, 6.0]},
             output_path="/tmp/output.root",
         )
-        ast.parse(code)
+        _assert_valid_python(code)
 
     def test_contains_tree_creation(self):
         code = root_file_write(
             data={"x": [1.0, 2.0]},
             output_path="/tmp/output.root",
         )
-        assert "TTree" in code
-        assert "TFile" in code
-        assert "Branch" in code
-        assert "Fill" in code
-        assert "Write" in code
+        missing = {s for s in ("TTree", "TFile", "Branch", "Fill", "Write") if s not in code}
+        assert not missing, missing
+
+    def test_equal_length_columns_use_columnar_snapshot(self):
+        code = root_file_write(
+            data={"x": [1.0, 2.0], "y": [3.0, 4.0]},
+            output_path="/tmp/output.root",
+        )
+        _assert_valid_python(code)
+        assert "ROOT.RDF.FromNumpy" in code
+        assert "Snapshot('tree', '/tmp/output.root')" in code
+        assert "t.Fill()" in code  # fallback for ROOT without FromNumpy
+
+    def test_ragged_columns_fill_entry_by_entry(self):
+        code = root_file_write(
+            data={"x": [1.0, 2.0], "y": [3.0]},
+            output_path="/tmp/output.root",
+        )
+        assert "FromNumpy" not in code
+        assert "t.Fill()" in code
 
     def test_custom_tree_name(self):
         code = root_file_write(
@@ -300,7 +384,7 @@ class TestRootMacroTemplate:
 
     def test_generates_valid_python(self):
         code = root_macro(macro_code='cout << "hello" << endl;')
-        ast.parse(code)
+        _assert_valid_python(code)
 
     def test_contains_process_line(self):
         code = root_macro(macro_code='TH1F h("h","h",100,-5,5);')
@@ -316,7 +400,7 @@ class TestRootMacroTemplate:
 
     def test_escapes_special_chars(self):
         code = root_macro(macro_code='cout << "value = " << x << "\\n";')
-        ast.parse(code)  # Should still be valid Python
+        _assert_valid_python(code)  # Should still be valid Python
 
     def test_batch_mode(self):
         code = root_macro(macro_code="int x = 42;")
@@ -328,24 +412,45 @@ class TestRootMacroTemplate:
 # ---------------------------------------------------------------------------
 
 
+@pytest.fixture(scope="module")
+def root_native_tools():
+    return {tool.name: tool for tool in ROOTMCPServer(Config())._get_root_native_tools()}
+
+
+@pytest.fixture
+def root_interpreter():
+    """Run template scripts for real only when ROOT is importable.
+
+    Without ROOT every script would just fail at ``import ROOT``, so the
+    interpreter is replaced by a stand-in that records that failure in
+    ``_result.json``; the executor's setup, result parsing and cleanup still run.
+    """
+    if is_root_available():
+        yield
+        return
+
+    def fail_import(args, *, cwd, **kwargs):
+        with open(os.path.join(cwd, "_result.json"), "w") as f:
+            json.dump({"status": "error", "error": "No module named 'ROOT'"}, f)
+        return subprocess.CompletedProcess(args, 1, "", "ModuleNotFoundError")
+
+    with patch("root_mcp.extended.root_native.executor._run_capped", side_effect=fail_import):
+        yield
+
+
+# The tool tests spawn interpreters that try to import ROOT; under
+# ``pytest -n auto --dist loadgroup`` they share one worker (and one module
+# fixture) while the pure template tests spread across the others.
+@pytest.mark.xdist_group("root_subprocess")
+@pytest.mark.usefixtures("root_interpreter")
 class TestRunRDataFrameTool:
     """Tests for the run_rdataframe convenience tool."""
 
-    def setup_method(self):
-        self.work_dir = tempfile.mkdtemp(prefix="test_rdf_")
-        self.config = Config(
-            root_native=RootNativeConfig(
-                execution_timeout=10,
-                working_directory=self.work_dir,
-            )
-        )
-        self.tools = RootNativeTools(config=self.config)
-
-    def test_generates_and_executes_code(self):
+    def test_generates_and_executes_code(self, native_tools):
         """run_rdataframe should generate code and attempt execution."""
         # Without ROOT installed, the code will fail at import ROOT,
         # but we can verify the tool generates and runs code
-        result = self.tools.run_rdataframe(
+        result = native_tools.run_rdataframe(
             file_path="/nonexistent.root",
             tree_name="Events",
             branch="pt",
@@ -358,11 +463,11 @@ class TestRunRDataFrameTool:
         assert result["status"] in ("success", "error")
         assert "execution_time_seconds" in result
 
-    def test_skips_validation(self):
+    def test_skips_validation(self, native_tools):
         """Template-generated code should skip AST validation."""
         # The template imports json which could trigger warnings,
         # but skip_validation=True means no validation result
-        result = self.tools.run_rdataframe(
+        result = native_tools.run_rdataframe(
             file_path="/nonexistent.root",
             tree_name="Events",
             branch="pt",
@@ -375,31 +480,23 @@ class TestRunRDataFrameTool:
         assert "warnings" not in result
 
 
+@pytest.mark.xdist_group("root_subprocess")
+@pytest.mark.usefixtures("root_interpreter")
 class TestRunRootMacroTool:
     """Tests for the run_root_macro convenience tool."""
 
-    def setup_method(self):
-        self.work_dir = tempfile.mkdtemp(prefix="test_macro_")
-        self.config = Config(
-            root_native=RootNativeConfig(
-                execution_timeout=10,
-                working_directory=self.work_dir,
-            )
-        )
-        self.tools = RootNativeTools(config=self.config)
-
-    def test_generates_and_executes_code(self):
+    def test_generates_and_executes_code(self, native_tools):
         """run_root_macro should generate code and attempt execution."""
-        result = self.tools.run_root_macro(
+        result = native_tools.run_root_macro(
             macro_code="int x = 42;",
             timeout=5,
         )
         assert result["status"] in ("success", "error")
         assert "execution_time_seconds" in result
 
-    def test_skips_validation(self):
+    def test_skips_validation(self, native_tools):
         """Template-generated code should skip AST validation."""
-        result = self.tools.run_root_macro(
+        result = native_tools.run_root_macro(
             macro_code="int x = 1;",
             timeout=5,
         )
@@ -409,39 +506,24 @@ class TestRunRootMacroTool:
 class TestToolSchemas:
     """Tests for tool schema registration."""
 
-    def test_root_native_tools_includes_all_three(self):
+    def test_root_native_tools_includes_all_three(self, root_native_tools):
         """_get_root_native_tools should return all 3 tools."""
-        config = Config()
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
-        tools = server._get_root_native_tools()
-        names = [t.name for t in tools]
+        names = root_native_tools.keys()
         assert "run_root_code" in names
         assert "run_rdataframe" in names
         assert "run_root_macro" in names
 
-    def test_run_rdataframe_schema_has_required_fields(self):
-        config = Config()
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
-        tools = server._get_root_native_tools()
-        rdf_tool = next(t for t in tools if t.name == "run_rdataframe")
+    def test_run_rdataframe_schema_has_required_fields(self, root_native_tools):
+        rdf_tool = root_native_tools["run_rdataframe"]
         required = rdf_tool.inputSchema["required"]
-        assert "file_path" in required
-        assert "tree_name" in required
-        assert "branch" in required
-        assert "bins" in required
-        assert "range_min" in required
-        assert "range_max" in required
-
-    def test_run_root_macro_schema_has_required_fields(self):
-        config = Config()
-        from root_mcp.server import ROOTMCPServer
-
-        server = ROOTMCPServer(config)
-        tools = server._get_root_native_tools()
-        macro_tool = next(t for t in tools if t.name == "run_root_macro")
+        missing = {
+            s
+            for s in ("file_path", "tree_name", "branch", "bins", "range_min", "range_max")
+            if s not in required
+        }
+        assert not missing, missing
+
+    def test_run_root_macro_schema_has_required_fields(self, root_native_tools):
+        macro_tool = root_native_tools["run_root_macro"]
         required = macro_tool.inputSchema["required"]
         assert "macro_code" in required